@@ -0,0 +1,161 @@
+import asyncio
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from .database import AsyncSessionLocal
+from .models import Job
+from .repositories.job_repository import JobRepository
+from modules.env import JOB_WORKERS, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_DRAIN_TIMEOUT
+from modules.logger import logger
+
+# How often idle workers check for jobs queued by other processes
+POLL_INTERVAL_SECONDS = 2.0
+
+class JobQueue:
+    """Durable job queue on top of the jobs table, run by a fixed pool of workers.
+
+    Jobs are claimed with a lease that the worker renews while it runs. If the
+    process dies, the lease runs out and the job is requeued by the next
+    orphan sweep, which runs at startup and every lease_seconds / 2 while the
+    queue is running (in any process sharing the jobs table). On shutdown,
+    workers stop claiming and in-flight jobs get drain_timeout seconds to
+    finish before they are put back in the queue.
+
+    The session factory can be swapped, e.g. for a test database.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        lease_seconds: int = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        drain_timeout: float = JOB_DRAIN_TIMEOUT,
+        session_factory: Callable = AsyncSessionLocal,
+    ):
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.drain_timeout = drain_timeout
+        self.session_factory = session_factory
+        self.worker_prefix = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._handler: Optional[Callable[[Job], Awaitable[None]]] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks: list[asyncio.Task] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self._running: dict[str, str] = {}  # job_id -> worker_id
+
+    async def start(self, handler: Callable[[Job], Awaitable[None]]) -> None:
+        """Requeue orphaned jobs and start the worker pool and the orphan sweeper."""
+        self._handler = handler
+        self._stopping = False
+
+        await self._requeue_orphaned()
+
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{self.worker_prefix}-{i}"))
+            for i in range(self.workers)
+        ]
+        self._sweeper = asyncio.create_task(self._sweep_orphaned())
+        logger.info("Job queue started with %d workers", self.workers)
+
+    def notify(self) -> None:
+        """Wake idle workers, call after queueing a job."""
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop claiming jobs and let in-flight jobs finish (up to drain_timeout)."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        if not self._tasks:
+            return
+
+        logger.info("Draining job queue (%d jobs in flight)", len(self._running))
+        _, pending = await asyncio.wait(self._tasks, timeout=self.drain_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        # Whatever didn't finish goes back in the queue for the next start
+        if self._running:
+            async with self.session_factory() as db:
+                repo = JobRepository(db)
+                for job_id, worker_id in self._running.items():
+                    await repo.release(job_id, worker_id)
+                await db.commit()
+            logger.warning("Released %d unfinished jobs back to the queue", len(self._running))
+            self._running.clear()
+        self._tasks = []
+
+    async def _requeue_orphaned(self) -> int:
+        """Requeue (or fail) processing jobs whose lease ran out. Returns jobs requeued."""
+        async with self.session_factory() as db:
+            requeued, failed = await JobRepository(db).requeue_orphaned(self.max_attempts)
+            await db.commit()
+        if requeued or failed:
+            logger.warning("Recovered orphaned jobs: %d requeued, %d failed after too many attempts", requeued, failed)
+        return requeued
+
+    async def _sweep_orphaned(self) -> None:
+        """Requeue orphaned jobs periodically, leases of dead workers can run out any time."""
+        while not self._stopping:
+            await asyncio.sleep(self.lease_seconds / 2)
+            try:
+                if await self._requeue_orphaned():
+                    self.notify()
+            except Exception as e:
+                logger.error("Orphaned job sweep failed: %s", str(e))
+
+    async def _claim(self, worker_id: str) -> Optional[Job]:
+        async with self.session_factory() as db:
+            job = await JobRepository(db).claim_next(worker_id, self.lease_seconds)
+            await db.commit()
+            return job
+
+    async def _worker(self, worker_id: str) -> None:
+        while not self._stopping:
+            try:
+                job = await self._claim(worker_id)
+            except Exception as e:
+                logger.error("Worker %s failed to claim a job: %s", worker_id, str(e))
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            logger.info("Worker %s picked up job %s (attempt %d)", worker_id, job.job_id, job.attempts)
+            self._running[job.job_id] = worker_id
+            heartbeat = asyncio.create_task(self._heartbeat(job.job_id, worker_id))
+            try:
+                await self._handler(job)
+            except asyncio.CancelledError:
+                raise  # stop() puts the job back in the queue
+            except Exception as e:
+                logger.error("Job %s crashed: %s", job.job_id, str(e), exc_info=True)
+            finally:
+                heartbeat.cancel()
+            self._running.pop(job.job_id, None)
+
+    async def _heartbeat(self, job_id: str, worker_id: str) -> None:
+        """Renew the job's lease while it's running."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with self.session_factory() as db:
+                    await JobRepository(db).renew_lease(job_id, worker_id, self.lease_seconds)
+                    await db.commit()
+            except Exception as e:
+                logger.warning("Failed to renew lease for job %s: %s", job_id, str(e))
+
+job_queue = JobQueue()
@@ -11,12 +11,15 @@ from fastapi.openapi.docs import get_swagger_ui_html
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi.middleware.cors import CORSMiddleware
 import botocore.exceptions
-from modules.env import API_KEY
+from modules.env import API_KEY, WATCH_BUCKET, WATCH_PREFIX
 
 # Add parent directory to path so we can import from modules
 sys.path.append(str(Path(__file__).parent.parent))
 from modules.logger import setup_logger, logger
-from api.routers import documents, search
+from api.routers import documents, search, system
+from api.job_queue import job_queue
+from api.s3_watcher import S3Watcher
+from modules.concurrency import shutdown_process_pool
 from api.schemas.error import ErrorCode, ErrorResponse
 
 @asynccontextmanager
@@ -37,11 +40,23 @@ async def lifespan(app: FastAPI):
         logger.info("Successfully validated embedding provider")
     except Exception as e:
         raise RuntimeError("Failed to validate embedding provider") from e
+
+    # Requeue jobs orphaned by a crash and start processing workers
+    await job_queue.start(documents.run_job)
+
+    # Queue new, changed and deleted files of the watched bucket automatically
+    watcher = S3Watcher(WATCH_BUCKET, WATCH_PREFIX) if WATCH_BUCKET else None
+    if watcher:
+        await watcher.start()
     
     yield  # Server is running and handling requests
     
-    # Shutdown: Clean up resources if needed
+    # Shutdown: Stop watching, let in-flight jobs finish, requeue the rest
     logger.info("Application shutting down")
+    if watcher:
+        await watcher.stop()
+    await job_queue.stop()
+    shutdown_process_pool()
 
 # Initialize FastAPI app with lifespan and custom docs
 app = FastAPI(
@@ -199,4 +214,5 @@ app.dependency_overrides[api_key_header] = verify_api_key
 
 # Include routers
 app.include_router(documents.router)
-app.include_router(search.router) 
\ No newline at end of file
+app.include_router(search.router)
+app.include_router(system.router) 
\ No newline at end of file
@@ -1,8 +1,11 @@
-from sqlalchemy import Column, String, Integer, DateTime, func
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, Index, func
 from .database import Base
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
 
     job_id = Column(String, primary_key=True)
     status = Column(String, nullable=False)
@@ -11,4 +14,51 @@ class Job(Base):
     bucket = Column(String, nullable=False)
     file_key = Column(String, nullable=False)
     chunks_processed = Column(Integer, nullable=True)
-    error = Column(String, nullable=True) 
\ No newline at end of file
+    error = Column(String, nullable=True)
+    force_reload = Column(Boolean, nullable=False, default=False, server_default="0")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    worker_id = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    # "document" jobs process file_key, "delete" jobs remove it from the index,
+    # "batch" jobs process every file under the file_key prefix (optionally
+    # matching pattern)
+    kind = Column(String, nullable=False, default="document", server_default="document")
+    pattern = Column(String, nullable=True)
+    concurrency = Column(Integer, nullable=True)
+    files_total = Column(Integer, nullable=True)
+    files_done = Column(Integer, nullable=True)
+    files_skipped = Column(Integer, nullable=True)
+    files_failed = Column(Integer, nullable=True)
+
+class Document(Base):
+    """Manifest of processed documents, one row per source key."""
+    __tablename__ = "documents"
+    __table_args__ = (
+        Index("ix_documents_bucket_raw_key", "bucket", "raw_key"),
+    )
+
+    key = Column(String, primary_key=True)
+    # S3 key as listed, key is URL encoded (see encode_key) and sorts differently
+    raw_key = Column(String, nullable=False)
+    bucket = Column(String, nullable=False)
+    chunk_count = Column(Integer, nullable=False)
+    content_hash = Column(String, nullable=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(DateTime, nullable=True)
+    embedding_model = Column(String, nullable=False)
+    # Splitter settings the chunks were made with, see CHUNKING_FINGERPRINT
+    chunking = Column(String, nullable=True)
+    embedded_at = Column(DateTime, nullable=False)
+
+class WatchCheckpoint(Base):
+    """Where the S3 watcher left off in a bucket listing, one row per bucket and prefix."""
+    __tablename__ = "watch_checkpoints"
+
+    bucket = Column(String, primary_key=True)
+    prefix = Column(String, primary_key=True)
+    # Last key checked in the current pass, None at the start of a pass
+    start_after = Column(String, nullable=True)
+    pass_started_at = Column(DateTime, nullable=True)
+    last_pass_completed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=False)
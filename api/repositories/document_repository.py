@@ -0,0 +1,137 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional
+import urllib.parse
+
+from ..models import Document
+from modules.embedding_conf import EMBEDDING_MODEL
+from modules.splitter import CHUNKING_FINGERPRINT
+from modules.sqlite_batches import lookup_batches
+
+def is_document_unchanged(document: Document | None, file_info: dict) -> bool:
+    """Tell if an S3 object still matches what we processed, from its ETag and Last-Modified.
+
+    Documents embedded with another model or split with other settings
+    count as changed, so they're processed again.
+    """
+    return (
+        document is not None
+        and document.etag is not None
+        and document.etag == file_info["etag"]
+        and document.last_modified == file_info["last_modified"]
+        and document.embedding_model == EMBEDDING_MODEL
+        and document.chunking == CHUNKING_FINGERPRINT
+    )
+
+def _prefix_end(prefix: str) -> Optional[str]:
+    """Get the smallest string above every string starting with prefix, None if there's no bound."""
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    last = ord(prefix[-1]) + 1
+    if 0xD800 <= last <= 0xDFFF:
+        # Surrogates aren't valid in stored strings, skip to the next character
+        last = 0xE000
+    return prefix[:-1] + chr(last)
+
+class DocumentRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, key: str) -> Document | None:
+        """Get a document by source key."""
+        query = select(Document).where(Document.key == key)
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def list_all(self) -> list[Document]:
+        """List all processed documents."""
+        query = select(Document).order_by(Document.key)
+        result = await self.session.execute(query)
+        return result.scalars().all()
+
+    async def get_many(self, keys: list[str]) -> dict[str, Document]:
+        """Get documents by source key, keyed by key (missing keys are left out)."""
+        documents = {}
+        for batch in lookup_batches(keys):
+            query = select(Document).where(Document.key.in_(batch))
+            result = await self.session.execute(query)
+            documents.update((document.key, document) for document in result.scalars())
+        return documents
+
+    async def list_keys_with_prefix(self, prefix: str, limit: Optional[int] = None) -> list[str]:
+        """List keys of documents starting with prefix, at most limit of them.
+
+        Not limited to a bucket: keys are unique across buckets in the
+        manifest, like the sources of chunks in the collection.
+        """
+        query = select(Document.key).where(Document.key.startswith(prefix, autoescape=True))
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self.session.execute(query.order_by(Document.key))
+        return list(result.scalars())
+
+    async def list_keys_between(
+        self,
+        bucket: str,
+        prefix: str,
+        after: Optional[str],
+        upto: Optional[str]
+    ) -> list[str]:
+        """List keys of a bucket's documents whose raw S3 key is under prefix, in the range (after, upto].
+
+        prefix, after and upto are raw keys, as in a listing, so they're
+        matched against raw_key, which sorts like the listing does. The
+        prefix is matched as a range too, so the whole query is an index range.
+        """
+        query = select(Document.key).where(Document.bucket == bucket, Document.raw_key >= prefix)
+        prefix_end = _prefix_end(prefix)
+        if prefix_end is not None:
+            query = query.where(Document.raw_key < prefix_end)
+        if after is not None:
+            query = query.where(Document.raw_key > after)
+        if upto is not None:
+            query = query.where(Document.raw_key <= upto)
+        result = await self.session.execute(query.order_by(Document.raw_key))
+        return list(result.scalars())
+
+    async def upsert(
+        self,
+        key: str,
+        bucket: str,
+        chunk_count: int,
+        embedding_model: str,
+        embedded_at: datetime,
+        content_hash: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[datetime] = None,
+        chunking: Optional[str] = None
+    ) -> Document:
+        """Create or update the manifest entry for a document."""
+        document = await self.get(key)
+        if document is None:
+            document = Document(key=key)
+            self.session.add(document)
+
+        document.raw_key = urllib.parse.unquote_plus(key)
+        document.bucket = bucket
+        document.chunk_count = chunk_count
+        document.embedding_model = embedding_model
+        document.embedded_at = embedded_at
+        document.content_hash = content_hash
+        document.etag = etag
+        document.last_modified = last_modified
+        document.chunking = chunking
+
+        await self.session.flush()
+        return document
+
+    async def delete(self, key: str) -> bool:
+        """Delete the manifest entry for a document."""
+        document = await self.get(key)
+        if document is None:
+            return False
+        await self.session.delete(document)
+        await self.session.flush()
+        return True
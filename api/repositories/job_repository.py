@@ -1,10 +1,11 @@
-from sqlalchemy import select
+from sqlalchemy import select, update, or_
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
 
 from ..models import Job
 from ..schemas.job import JobCreate, JobUpdate
+from modules.sqlite_batches import lookup_batches
 
 class JobRepository:
     def __init__(self, session: AsyncSession):
@@ -14,9 +15,14 @@ class JobRepository:
         """Create a new job."""
         job = Job(
             job_id=str(uuid.uuid4()),
-            status="processing",
+            status="queued",
             bucket=job_data.bucket,
             file_key=job_data.key,
+            force_reload=job_data.force_reload,
+            kind=job_data.kind,
+            pattern=job_data.pattern,
+            concurrency=job_data.concurrency,
+            attempts=0,
             created_at=datetime.utcnow()
         )
         self.session.add(job)
@@ -47,6 +53,127 @@ class JobRepository:
         await self.session.flush()
         return job
 
+    async def pending_keys(self, bucket: str, keys: list[str]) -> set[str]:
+        """Get which of a bucket's keys already have a queued or running file job."""
+        pending = set()
+        for batch in lookup_batches(keys):
+            query = select(Job.file_key).where(
+                Job.bucket == bucket,
+                Job.kind != "batch",
+                Job.status.in_(("queued", "processing")),
+                Job.file_key.in_(batch)
+            )
+            result = await self.session.execute(query)
+            pending.update(result.scalars())
+        return pending
+
+    async def claim_next(self, worker_id: str, lease_seconds: int) -> Job | None:
+        """Claim the oldest queued job for a worker, with a lease.
+
+        The claim is a single UPDATE, so two workers can never get the same job.
+        """
+        next_job_id = (
+            select(Job.job_id)
+            .where(Job.status == "queued")
+            .order_by(Job.created_at)
+            .limit(1)
+            .scalar_subquery()
+        )
+        query = (
+            update(Job)
+            .where(Job.job_id == next_job_id, Job.status == "queued")
+            .values(
+                status="processing",
+                worker_id=worker_id,
+                lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds),
+                started_at=datetime.utcnow(),
+                attempts=Job.attempts + 1
+            )
+            .returning(Job)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def renew_lease(self, job_id: str, worker_id: str, lease_seconds: int) -> bool:
+        """Extend a worker's lease on a job it's still processing."""
+        query = (
+            update(Job)
+            .where(Job.job_id == job_id, Job.worker_id == worker_id, Job.status == "processing")
+            .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(query)
+        return result.rowcount > 0
+
+    async def release(self, job_id: str, worker_id: str) -> bool:
+        """Put a job a worker couldn't finish back in the queue."""
+        query = (
+            update(Job)
+            .where(Job.job_id == job_id, Job.worker_id == worker_id, Job.status == "processing")
+            .values(status="queued", worker_id=None, lease_expires_at=None, attempts=Job.attempts - 1)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(query)
+        return result.rowcount > 0
+
+    async def requeue_orphaned(self, max_attempts: int) -> tuple[int, int]:
+        """Requeue processing jobs whose lease ran out (their worker died).
+
+        Jobs that already used max_attempts are failed instead, so a job that
+        crashes the process can't loop forever.
+
+        Returns:
+            tuple[int, int]: (jobs requeued, jobs failed)
+        """
+        now = datetime.utcnow()
+        is_orphaned = (
+            (Job.status == "processing")
+            & or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now)
+        )
+        failed = await self.session.execute(
+            update(Job)
+            .where(is_orphaned, Job.attempts >= max_attempts)
+            .values(
+                status="error",
+                completed_at=now,
+                worker_id=None,
+                lease_expires_at=None,
+                error=f"Job abandoned after {max_attempts} attempts"
+            )
+            .execution_options(synchronize_session=False)
+        )
+        requeued = await self.session.execute(
+            update(Job)
+            .where(is_orphaned)
+            .values(status="queued", worker_id=None, lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        return requeued.rowcount, failed.rowcount
+
+    async def update_progress(
+        self,
+        job_id: str,
+        files_total: int,
+        files_done: int,
+        files_skipped: int,
+        files_failed: int,
+        chunks_processed: int
+    ) -> None:
+        """Record a batch job's aggregate progress."""
+        await self.session.execute(
+            update(Job)
+            .where(Job.job_id == job_id)
+            .values(
+                files_total=files_total,
+                files_done=files_done,
+                files_skipped=files_skipped,
+                files_failed=files_failed,
+                chunks_processed=chunks_processed
+            )
+            .execution_options(synchronize_session=False)
+        )
+
     async def complete_job(self, job_id: str, chunks_processed: int) -> Job | None:
         """Mark a job as completed."""
         return await self.update(
@@ -58,6 +185,17 @@ class JobRepository:
             )
         )
 
+    async def skip_job(self, job_id: str, chunks_processed: int) -> Job | None:
+        """Mark a job as skipped (object unchanged since it was processed)."""
+        return await self.update(
+            job_id,
+            JobUpdate(
+                status="skipped",
+                completed_at=datetime.utcnow(),
+                chunks_processed=chunks_processed
+            )
+        )
+
     async def fail_job(self, job_id: str, error: str) -> Job | None:
         """Mark a job as failed."""
         return await self.update(
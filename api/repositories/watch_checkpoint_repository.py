@@ -0,0 +1,37 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional
+
+from ..models import WatchCheckpoint
+
+class WatchCheckpointRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, bucket: str, prefix: str) -> WatchCheckpoint | None:
+        """Get the watcher checkpoint for a bucket and prefix."""
+        query = select(WatchCheckpoint).where(
+            WatchCheckpoint.bucket == bucket,
+            WatchCheckpoint.prefix == prefix
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def save(self, bucket: str, prefix: str, start_after: Optional[str]) -> WatchCheckpoint:
+        """Record where the watcher stopped. start_after=None means the pass is complete."""
+        now = datetime.utcnow()
+        checkpoint = await self.get(bucket, prefix)
+        if checkpoint is None:
+            checkpoint = WatchCheckpoint(bucket=bucket, prefix=prefix, pass_started_at=now)
+            self.session.add(checkpoint)
+
+        if checkpoint.start_after is None and start_after is not None:
+            checkpoint.pass_started_at = now
+        if start_after is None:
+            checkpoint.last_pass_completed_at = now
+        checkpoint.start_after = start_after
+        checkpoint.updated_at = now
+
+        await self.session.flush()
+        return checkpoint
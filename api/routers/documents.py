@@ -1,26 +1,46 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from openai import OpenAI
 from datetime import datetime
 from ..database import get_db, AsyncSessionLocal
+from ..models import Job
+from ..job_queue import job_queue
 from ..repositories.job_repository import JobRepository
-from ..schemas.job import JobCreate, JobResponse
+from ..repositories.document_repository import DocumentRepository, is_document_unchanged
+from ..schemas.job import JobCreate, JobUpdate, JobResponse, BatchProgress
 from ..schemas.error import ErrorCode
-from modules.s3_connection import get_s3_client, check_bucket_exists, get_file_content
-from modules.splitter import split_text
-from modules.collection_manager import init_collection, check_document_exists
+from modules.s3_connection import (
+    get_s3_client, check_bucket_exists, get_file_bytes, get_file_metadata, open_file, list_objects_page, encode_key
+)
+from modules.splitter import split_text_stream, iter_lines, CHUNKING_FINGERPRINT
+from modules.preprocess import prepare_document
+from modules.collection_manager import init_collection, get_document_chunk_ids
 from modules.logger import logger
-from modules.env import OPENAI_API_KEY
+from modules.env import OPENAI_API_KEY, BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY
+from modules.embedding_conf import EMBEDDING_MODEL
+from modules.indexer import sync_document_chunks, remove_document_chunks
+from modules.concurrency import run_blocking, run_in_process, ingest_executor
 from modules.embeddings import get_document_chunk_embeddings
+import asyncio
+import fnmatch
+import hashlib
+import botocore.exceptions
 import time
-from typing import List
+from typing import List, Optional
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
 s3_client = get_s3_client()
 chroma_client, collection = init_collection()
 
 router = APIRouter(prefix="/api/v1/documents", tags=["documents"])
 
+# Files bigger than this are streamed from S3 instead of read into memory
+STREAMING_THRESHOLD = 5 * 1024 * 1024 # 5MB
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+# How often a running batch job writes its counters to the jobs table
+BATCH_PROGRESS_INTERVAL_SECONDS = 2.0
+
 class ProcessRequest(BaseModel):
     bucket: str
     key: str
@@ -35,6 +55,24 @@ class ProcessRequest(BaseModel):
             }
         }
 
+class BatchProcessRequest(BaseModel):
+    bucket: str
+    prefix: str = ""
+    glob: Optional[str] = None
+    force_reload: bool = False
+    concurrency: Optional[int] = Field(default=None, ge=1, le=BATCH_MAX_CONCURRENCY)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "bucket": "spacestation-labs-companion",
+                "prefix": "books/",
+                "glob": "books/*/chapter_*.md",
+                "force_reload": False,
+                "concurrency": 4
+            }
+        }
+
 class FileInfo(BaseModel):
     bucket: str
     key: str
@@ -61,82 +99,173 @@ def log_performance(duration: float, context: str = "", failed: bool = False):
     else:
         logger.info(f"PERF: Task {status}{context} - normal time ({duration:.2f}s)")
 
-async def process_document_task(job_id: str, bucket: str, key: str, force_reload: bool = False):
+async def run_job(job: Job):
+    """Job queue handler: run the pipeline for a claimed job."""
+    if job.kind == "batch":
+        await process_batch_task(job)
+    elif job.kind == "delete":
+        await process_delete_task(job.job_id, job.bucket, job.file_key)
+    else:
+        await process_document_task(job.job_id, job.bucket, job.file_key, job.force_reload)
+
+async def ingest_document(bucket: str, key: str, force_reload: bool = False, file_info: Optional[dict] = None) -> dict:
+    """Run the processing pipeline for one file.
+
+    Args:
+        bucket: Bucket name
+        key: File key (URL encoded)
+        force_reload: Re-process the file even if it was processed before
+        file_info: Object metadata from a listing, saves the HEAD request
+
+    Returns:
+        dict: status ("success" or "skipped") and chunks_processed
+
+    Raises:
+        Exception: If any stage of the pipeline fails
+    """
     task_start = time.time()
-    # Create a new database session specifically for this background task
     async with AsyncSessionLocal() as db:
-        repo = JobRepository(db)
-        try:
-            # Validate bucket exists
-            if not check_bucket_exists(bucket, s3_client):
-                raise Exception(f"Bucket '{bucket}' not found or not accessible")
+        documents = DocumentRepository(db)
 
-            # Check if already processed
-            check_start = time.time()
-            doc_ids = [f"{key}_{i}" for i in range(1000)]
-            existing_docs = [id for id in doc_ids if check_document_exists(collection, id)]
-            logger.debug(f"Found {len(existing_docs)} documents")
-            log_performance(time.time() - check_start, "document existence check")
-            
-            if existing_docs and not force_reload:
-                logger.info("File %s already processed (%d chunks)", key, len(existing_docs))
-                await repo.complete_job(job_id, chunks_processed=len(existing_docs))
-                await db.commit()
-                log_performance(time.time() - task_start, "already processed file")
-                return
+        # Check if already processed (manifest first, no Chroma scan needed)
+        check_start = time.time()
+        document = await documents.get(key)
+        if document and not force_reload:
+            logger.info("File %s already processed (%d chunks)", key, document.chunk_count)
+            log_performance(time.time() - task_start, "already processed file")
+            return {"status": "success", "chunks_processed": document.chunk_count}
+
+        # Skip objects that haven't changed since we processed them, without downloading
+        if file_info is None:
+            head_start = time.time()
+            file_info = await run_blocking(get_file_metadata, bucket, key, s3_client, executor=ingest_executor)
+            log_performance(time.time() - head_start, "S3 HEAD request")
+        if is_document_unchanged(document, file_info):
+            logger.info("File %s unchanged since last processed (ETag %s), skipping", key, file_info["etag"])
+            log_performance(time.time() - task_start, "unchanged file")
+            return {"status": "skipped", "chunks_processed": document.chunk_count}
+
+        existing_docs = await run_blocking(get_document_chunk_ids, collection, key, executor=ingest_executor)
+        logger.debug(f"Found {len(existing_docs)} documents")
+        log_performance(time.time() - check_start, "document existence check")
+        
+        if existing_docs and not force_reload:
+            # Processed before the manifest existed, record it now
+            logger.info("File %s already processed (%d chunks)", key, len(existing_docs))
+            await documents.upsert(
+                key=key,
+                bucket=bucket,
+                chunk_count=len(existing_docs),
+                embedding_model=EMBEDDING_MODEL,
+                embedded_at=datetime.utcnow()
+            )
+            await db.commit()
+            log_performance(time.time() - task_start, "already processed file")
+            return {"status": "success", "chunks_processed": len(existing_docs)}
 
-            # Get content from S3
+        if file_info["size"] is not None and file_info["size"] > STREAMING_THRESHOLD:
+            # Too big to hold in memory, stream it through the splitter into the collection
+            store_start = time.time()
+            logger.info("Streaming %s (%d bytes)", key, file_info["size"])
+            embedded_at = datetime.utcnow()
+            chunk_count, file_hash, file_info = await run_blocking(
+                sync_streamed_file, bucket, key, embedded_at, executor=ingest_executor
+            )
+            log_performance(time.time() - store_start, "streamed embedding and ChromaDB sync")
+        else:
+            # Get content from S3 (raw bytes, decoding happens with the split)
             s3_start = time.time()
             logger.debug("Fetching content from S3")
-            content = get_file_content(bucket, key, s3_client)
-            logger.debug("Content sample (first 500 chars): %s", content[:500])
-            logger.debug("Content length: %d bytes", len(content))
+            data, file_info = await run_blocking(get_file_bytes, bucket, key, s3_client, executor=ingest_executor)
+            logger.debug("Content length: %d bytes", len(data))
             log_performance(time.time() - s3_start, "S3 content fetch")
-            
-            # Split into chunks
+
+            # Decode, hash, split and validate in the process pool, off the event loop and the GIL
             split_start = time.time()
             logger.debug("Splitting content into chunks")
-            chunks = split_text(content)
+            chunks, file_hash = await run_in_process(prepare_document, data)
+            del data
             logger.info("Split into %d chunks", len(chunks))
-            log_performance(time.time() - split_start, "text splitting")
-            
-            # Chunk validation
-            validation_start = time.time()
-            empty_chunks = [i for i, chunk in enumerate(chunks) if not chunk.strip()]
-            if empty_chunks:
-                logger.error("Found %d empty chunks at indices: %s", 
-                            len(empty_chunks), 
-                            empty_chunks[:10])
-                raise ValueError(f"Document contains {len(empty_chunks)} empty chunks")
-            log_performance(time.time() - validation_start, "chunk validation")
-
-            # Get embeddings
-            embedding_start = time.time()
-            embeddings = get_document_chunk_embeddings(chunks)
-            log_performance(time.time() - embedding_start, "embedding generation")
-            
-            # Delete old chunks if reloading
-            if existing_docs and force_reload:
-                delete_start = time.time()
-                logger.info("Removing old chunks before reload")
-                collection.delete(ids=existing_docs)
-                log_performance(time.time() - delete_start, "deleting old chunks")
-            
-            # Store in ChromaDB
+            log_performance(time.time() - split_start, "decoding, hashing and text splitting")
+
+            # Embed and store only new chunks, drop removed ones, reindex moved ones
             store_start = time.time()
-            logger.debug("Storing chunks in ChromaDB")
-            collection.add(
-                documents=chunks,
-                embeddings=embeddings,
-                ids=[f"{key}_{i}" for i in range(len(chunks))],
-                metadatas=[{"source": key, "chunk": i, "embedded_at": datetime.utcnow().isoformat()} for i in range(len(chunks))]
+            logger.debug("Syncing chunks with ChromaDB")
+            embedded_at = datetime.utcnow()
+            await run_blocking(
+                sync_document_chunks, collection, key, chunks, get_document_chunk_embeddings, embedded_at,
+                tags=file_info["tags"], executor=ingest_executor
             )
-            log_performance(time.time() - store_start, "ChromaDB storage")
-            
-            logger.info("Successfully processed file %s", key)
-            await repo.complete_job(job_id, chunks_processed=len(chunks))
+            chunk_count = len(chunks)
+            log_performance(time.time() - store_start, "embedding and ChromaDB sync")
+
+        await documents.upsert(
+            key=key,
+            bucket=bucket,
+            chunk_count=chunk_count,
+            embedding_model=EMBEDDING_MODEL,
+            embedded_at=embedded_at,
+            content_hash=file_hash,
+            etag=file_info["etag"],
+            last_modified=file_info["last_modified"],
+            chunking=CHUNKING_FINGERPRINT
+        )
+        await db.commit()
+
+        logger.info("Successfully processed file %s", key)
+        log_performance(time.time() - task_start, f"processing {key}")
+        return {"status": "success", "chunks_processed": chunk_count}
+
+def sync_streamed_file(bucket: str, key: str, embedded_at: datetime) -> tuple[int, str, dict]:
+    """Stream a file from S3 through the splitter and into the collection.
+
+    Blocking, run it in a worker thread. Only one download block, one
+    section (or paragraph) and one write batch are in memory at a time, so
+    memory use doesn't grow with the file size.
+
+    Returns:
+        tuple[int, str, dict]: Chunk count, content hash and object metadata
+    """
+    body, file_info = open_file(bucket, key, s3_client)
+    # Hash of the raw bytes, same as content_hash() of the decoded text
+    hasher = hashlib.sha256()
+
+    def blocks():
+        for block in body.iter_chunks(STREAM_BLOCK_SIZE):
+            hasher.update(block)
+            yield block
+
+    def validated(chunks):
+        for i, chunk in enumerate(chunks):
+            if not chunk.strip():
+                raise ValueError(f"Document contains an empty chunk at index {i}")
+            yield chunk
+
+    try:
+        chunks = validated(split_text_stream(iter_lines(blocks())))
+        result = sync_document_chunks(
+            collection, key, chunks, get_document_chunk_embeddings, embedded_at, tags=file_info["tags"]
+        )
+    finally:
+        body.close()
+    return result["added"] + result["unchanged"], hasher.hexdigest(), file_info
+
+async def process_document_task(job_id: str, bucket: str, key: str, force_reload: bool = False):
+    task_start = time.time()
+    # Create a new database session specifically for this background task
+    async with AsyncSessionLocal() as db:
+        repo = JobRepository(db)
+        try:
+            # Validate bucket exists
+            if not await run_blocking(check_bucket_exists, bucket, s3_client, executor=ingest_executor):
+                raise Exception(f"Bucket '{bucket}' not found or not accessible")
+
+            result = await ingest_document(bucket, key, force_reload)
+            if result["status"] == "skipped":
+                await repo.skip_job(job_id, chunks_processed=result["chunks_processed"])
+            else:
+                await repo.complete_job(job_id, chunks_processed=result["chunks_processed"])
             await db.commit()
-            log_performance(time.time() - task_start, f"processing {key}")
 
         except Exception as e:
             error_msg = f"Failed to process file {key}: {str(e)}"
@@ -145,10 +274,194 @@ async def process_document_task(job_id: str, bucket: str, key: str, force_reload
             await db.commit()
             log_performance(time.time() - task_start, f"processing {key}", failed=True)
 
+async def process_delete_task(job_id: str, bucket: str, key: str):
+    """Remove a file deleted from S3 from the index and the manifest."""
+    task_start = time.time()
+    async with AsyncSessionLocal() as db:
+        repo = JobRepository(db)
+        try:
+            # The object may have been uploaded again since it was seen missing
+            try:
+                await run_blocking(get_file_metadata, bucket, key, s3_client, executor=ingest_executor)
+                logger.info("File %s exists again, not removing it", key)
+                await repo.skip_job(job_id, chunks_processed=0)
+                await db.commit()
+                return
+            except botocore.exceptions.ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                    raise
+
+            removed = await run_blocking(remove_document_chunks, collection, key, executor=ingest_executor)
+            await DocumentRepository(db).delete(key)
+            await repo.complete_job(job_id, chunks_processed=removed)
+            await db.commit()
+            log_performance(time.time() - task_start, f"removing {key}")
+
+        except Exception as e:
+            error_msg = f"Failed to remove file {key}: {str(e)}"
+            logger.error(error_msg)
+            await repo.fail_job(job_id, error_msg)
+            await db.commit()
+            log_performance(time.time() - task_start, f"removing {key}", failed=True)
+
+class BatchCounters:
+    """Running totals of a batch job, flushed to its job row periodically."""
+
+    def __init__(self):
+        self.files_total = 0
+        self.files_done = 0
+        self.files_skipped = 0
+        self.files_failed = 0
+        self.chunks_processed = 0
+        self.last_error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "files_skipped": self.files_skipped,
+            "files_failed": self.files_failed,
+            "chunks_processed": self.chunks_processed,
+        }
+
+def _matches_batch(key: str, pattern: Optional[str]) -> bool:
+    """Tell if a listed key should be processed by a batch job."""
+    if not key.lower().endswith('.md'):
+        return False
+    return pattern is None or fnmatch.fnmatchcase(key, pattern)
+
+async def _save_batch_progress(job_id: str, counters: BatchCounters) -> None:
+    async with AsyncSessionLocal() as db:
+        await JobRepository(db).update_progress(job_id, **counters.as_dict())
+        await db.commit()
+
+async def _report_batch_progress(job_id: str, counters: BatchCounters) -> None:
+    """Flush a batch job's counters every few seconds until cancelled."""
+    while True:
+        await asyncio.sleep(BATCH_PROGRESS_INTERVAL_SECONDS)
+        try:
+            await _save_batch_progress(job_id, counters)
+        except Exception as e:
+            logger.warning("Failed to save progress for batch job %s: %s", job_id, str(e))
+
+async def process_batch_task(job: Job):
+    """Process every markdown file under a prefix as one job.
+
+    Pages of the listing are fed to a bounded queue as they arrive, and
+    job.concurrency files go through the pipeline at a time, so memory use
+    doesn't depend on the number of files. A failed file is counted and
+    logged, it doesn't stop the batch. If the job is picked up again after
+    a crash, files that were already processed are skipped cheaply.
+    """
+    task_start = time.time()
+    concurrency = job.concurrency or BATCH_CONCURRENCY
+    counters = BatchCounters()
+    files: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def process_files():
+        while (item := await files.get()) is not None:
+            key, file_info = item
+            try:
+                result = await ingest_document(job.bucket, key, job.force_reload, file_info)
+                if result["status"] == "skipped":
+                    counters.files_skipped += 1
+                else:
+                    counters.files_done += 1
+                    counters.chunks_processed += result["chunks_processed"]
+            except Exception as e:
+                counters.files_failed += 1
+                counters.last_error = f"{key}: {str(e)}"
+                logger.error("Batch job %s failed to process file %s: %s", job.job_id, key, str(e))
+
+    async with AsyncSessionLocal() as db:
+        repo = JobRepository(db)
+        workers = [asyncio.create_task(process_files()) for _ in range(concurrency)]
+        reporter = asyncio.create_task(_report_batch_progress(job.job_id, counters))
+        try:
+            if not await run_blocking(check_bucket_exists, job.bucket, s3_client, executor=ingest_executor):
+                raise Exception(f"Bucket '{job.bucket}' not found or not accessible")
+
+            continuation_token = None
+            while True:
+                objects, continuation_token = await run_blocking(
+                    list_objects_page, job.bucket, job.file_key, s3_client, continuation_token,
+                    executor=ingest_executor
+                )
+                for obj in objects:
+                    if not _matches_batch(obj["key"], job.pattern):
+                        continue
+                    counters.files_total += 1
+                    await files.put((encode_key(obj["key"]), obj))
+                if continuation_token is None:
+                    break
+
+            for _ in workers:
+                await files.put(None)
+            await asyncio.gather(*workers)
+            reporter.cancel()
+
+            await repo.update_progress(job.job_id, **counters.as_dict())
+            await repo.complete_job(job.job_id, chunks_processed=counters.chunks_processed)
+            if counters.files_failed:
+                await repo.update(job.job_id, JobUpdate(
+                    error=f"{counters.files_failed} files failed, last error: {counters.last_error}"
+                ))
+            await db.commit()
+
+            duration = time.time() - task_start
+            logger.info("Batch job %s finished: %d processed, %d skipped, %d failed, %d chunks in %.1fs",
+                job.job_id, counters.files_done, counters.files_skipped, counters.files_failed,
+                counters.chunks_processed, duration)
+            log_performance(duration, f"batch {job.bucket}/{job.file_key}")
+
+        except Exception as e:
+            error_msg = f"Failed to process batch {job.bucket}/{job.file_key}: {str(e)}"
+            logger.error(error_msg)
+            await repo.update_progress(job.job_id, **counters.as_dict())
+            await repo.fail_job(job.job_id, error_msg)
+            await db.commit()
+            log_performance(time.time() - task_start, f"batch {job.bucket}/{job.file_key}", failed=True)
+        finally:
+            reporter.cancel()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(reporter, *workers, return_exceptions=True)
+
+def job_response(job: Job) -> JobResponse:
+    """Build the API response for a job, with throughput for batch jobs."""
+    progress = None
+    if job.kind == "batch":
+        files_finished = (job.files_done or 0) + (job.files_skipped or 0) + (job.files_failed or 0)
+        elapsed = 0.0
+        if job.started_at:
+            elapsed = ((job.completed_at or datetime.utcnow()) - job.started_at).total_seconds()
+        progress = BatchProgress(
+            prefix=job.file_key,
+            pattern=job.pattern,
+            files_total=job.files_total or 0,
+            files_done=job.files_done or 0,
+            files_skipped=job.files_skipped or 0,
+            files_failed=job.files_failed or 0,
+            files_per_second=files_finished / elapsed if elapsed > 0 else 0.0,
+            chunks_per_second=(job.chunks_processed or 0) / elapsed if elapsed > 0 else 0.0
+        )
+
+    return JobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        created_at=job.created_at,
+        completed_at=job.completed_at,
+        bucket=job.bucket,
+        key=job.file_key,
+        chunks_processed=job.chunks_processed,
+        error=job.error,
+        kind=job.kind,
+        progress=progress
+    )
+
 @router.post("/process", response_model=JobResponse)
 async def process_document(
     request: ProcessRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     if not request.key.lower().endswith('.md'):
@@ -162,7 +475,7 @@ async def process_document(
             }
         )
     
-    if not check_bucket_exists(request.bucket, s3_client):
+    if not await run_blocking(check_bucket_exists, request.bucket, s3_client):
         raise HTTPException(
             status_code=400,
             detail={
@@ -173,15 +486,36 @@ async def process_document(
             }
         )
     
-    content = get_file_content(request.bucket, request.key, s3_client)
-    size_threshold = 5 * 1024 * 1024 # 5MB
-    if len(content) > size_threshold:
+    # Fail fast on missing files (HEAD only, the background task downloads the body once)
+    await run_blocking(get_file_metadata, request.bucket, request.key, s3_client)
+
+    repo = JobRepository(db)
+
+    job = await repo.create(JobCreate(
+        bucket=request.bucket,
+        key=request.key,
+        force_reload=request.force_reload
+    ))
+    
+    # Commit before waking the workers so they can claim it
+    await db.commit()
+    job_queue.notify()
+    
+    return job_response(job)
+
+@router.post("/process/batch", response_model=JobResponse)
+async def process_batch(
+    request: BatchProcessRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Process every markdown file under a prefix (optionally matching a glob) as one job."""
+    if not await run_blocking(check_bucket_exists, request.bucket, s3_client):
         raise HTTPException(
             status_code=400,
             detail={
                 "error": {
                     "code": ErrorCode.INVALID_REQUEST,
-                    "message": "File size exceeds 5MB"
+                    "message": f"Bucket '{request.bucket}' not found or not accessible"
                 }
             }
         )
@@ -190,27 +524,17 @@ async def process_document(
 
     job = await repo.create(JobCreate(
         bucket=request.bucket,
-        key=request.key,
-        force_reload=request.force_reload
+        key=request.prefix,
+        force_reload=request.force_reload,
+        kind="batch",
+        pattern=request.glob,
+        concurrency=request.concurrency or BATCH_CONCURRENCY
     ))
-    
-    background_tasks.add_task(
-        process_document_task,
-        job.job_id,
-        request.bucket,
-        request.key,
-        request.force_reload
-    )
-    
-    return JobResponse(
-        job_id=job.job_id,
-        status=job.status,
-        created_at=job.created_at,
-        completed_at=job.completed_at,
-        bucket=job.bucket,
-        key=job.file_key,
-        file_info=FileInfo(bucket=job.bucket, key=job.file_key)
-    )
+
+    await db.commit()
+    job_queue.notify()
+
+    return job_response(job)
 
 @router.get("/jobs/{job_id}", response_model=JobResponse)
 async def get_job_status(
@@ -231,16 +555,7 @@ async def get_job_status(
             }
         )
     
-    return JobResponse(
-        job_id=job.job_id,
-        status=job.status,
-        created_at=job.created_at,
-        completed_at=job.completed_at,
-        bucket=job.bucket,
-        key=job.file_key,
-        chunks_processed=job.chunks_processed,
-        error=job.error
-    ) 
+    return job_response(job)
 
 @router.get("/jobs", response_model=list[JobResponse])
 async def list_jobs(
@@ -249,46 +564,25 @@ async def list_jobs(
     repo = JobRepository(db)
     jobs = await repo.list_all()
     
-    return [
-        JobResponse(
-            job_id=job.job_id,
-            status=job.status, 
-            created_at=job.created_at,
-            completed_at=job.completed_at,
-            bucket=job.bucket,
-            key=job.file_key,
-            chunks_processed=job.chunks_processed,
-            error=job.error
-        )
-        for job in jobs
-    ]
+    return [job_response(job) for job in jobs]
 
 @router.get("/stats", response_model=List[DocumentStats])
-async def get_document_stats():
-    """Get statistics about processed documents in the collection."""
+async def get_document_stats(
+    db: AsyncSession = Depends(get_db)
+):
+    """Get statistics about processed documents from the document manifest."""
     try:
-        # Get all documents from collection
-        results = collection.get(
-            include=['metadatas']
-        )
+        documents = await DocumentRepository(db).list_all()
         
-        if not results or not results['metadatas']:
-            return []
-        
-        # Group chunks by source document
-        doc_stats = {}
-        for metadata in results['metadatas']:
-            source = metadata['source']
-            if source not in doc_stats:
-                doc_stats[source] = {
-                    'document_id': source,
-                    'source': source,
-                    'chunk_count': 0,
-                    'embedded_at': datetime.fromisoformat(metadata['embedded_at'])
-                }
-            doc_stats[source]['chunk_count'] += 1
-        
-        return list(doc_stats.values())
+        return [
+            DocumentStats(
+                document_id=document.key,
+                source=document.key,
+                chunk_count=document.chunk_count,
+                embedded_at=document.embedded_at
+            )
+            for document in documents
+        ]
         
     except Exception as e:
         logger.error(f"Failed to get document stats: {str(e)}")
@@ -296,7 +590,7 @@ async def get_document_stats():
             status_code=500,
             detail={
                 "error": {
-                    "code": ErrorCode.INTERNAL_ERROR,
+                    "code": ErrorCode.SERVER_ERROR,
                     "message": "Failed to retrieve document statistics"
                 }
             }
@@ -1,20 +1,61 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from typing import List
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
 from modules.collection_manager import init_collection
 from modules.logger import logger
 from ..schemas.error import ErrorCode
-from modules.embeddings import get_query_embedding
+from ..database import AsyncSessionLocal
+from ..repositories.document_repository import DocumentRepository
+from modules.embeddings import get_query_embedding_async, get_query_embeddings_async
+from modules.concurrency import run_blocking
+from modules.search_cache import search_cache
+from modules.collection_version import collection_version
+from modules.keywords import keyword_scores
+from modules.env import RERANK_CANDIDATES, HYBRID_CANDIDATES, SEARCH_MAX_RESULTS, SEARCH_PREFIX_MAX_KEYS
+from modules.lexical_index import lexical_index
+from modules.search_cursors import search_cursors
+from modules.indexer import TAG_PREFIX, DIR_PREFIX, embedded_at_timestamp
 
 router = APIRouter(prefix="/api/v1/search", tags=["search"])
 
+# Most queries accepted by one batch search call
+MAX_BATCH_QUERIES = 50
+
+# Reciprocal rank fusion constant, dampens the weight of the very top ranks
+RRF_K = 60
+
+# Where clause for filters no chunk can match (a source prefix without documents)
+_NO_MATCHES = {"source": {"$in": []}}
+
 # Initialize clients
 chroma_client, collection = init_collection()
 
+class SearchFilters(BaseModel):
+    source: Optional[str] = None
+    source_prefix: Optional[str] = None
+    embedded_after: Optional[datetime] = None
+    embedded_before: Optional[datetime] = None
+    tags: Dict[str, str] = Field(default_factory=dict)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "source_prefix": "fundraising/",
+                "embedded_after": "2025-01-01T00:00:00",
+                "tags": {"team": "finance"}
+            }
+        }
+
 class SearchRequest(BaseModel):
     query: str
     limit: int = Field(default=5, ge=1, le=20)
     rerank: bool = Field(default=False)
+    hybrid: bool = Field(default=False)
+    paginate: bool = Field(default=False)
+    filters: Optional[SearchFilters] = None
+    min_similarity: Optional[float] = Field(default=None, ge=-1, le=1)
 
     class Config:
         json_schema_extra = {
@@ -32,6 +73,7 @@ class SearchResult(BaseModel):
 
 class SearchResponse(BaseModel):
     results: List[SearchResult]
+    next_cursor: Optional[str] = None
 
     class Config:
         json_schema_extra = {
@@ -49,6 +91,43 @@ class SearchResponse(BaseModel):
             }
         }
 
+class PageRequest(BaseModel):
+    cursor: str
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "cursor": "9b1f3c7e2d4a4f6b8c0e1a2b3c4d5e6f:5"
+            }
+        }
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(min_length=1, max_length=MAX_BATCH_QUERIES)
+    limit: int = Field(default=5, ge=1, le=20)
+    rerank: bool = Field(default=False)
+    hybrid: bool = Field(default=False)
+    filters: Optional[SearchFilters] = None
+    min_similarity: Optional[float] = Field(default=None, ge=-1, le=1)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "queries": [
+                    "When should a startup start fundraising?",
+                    "How much runway should we keep?"
+                ],
+                "limit": 5,
+                "rerank": False
+            }
+        }
+
+class QueryResults(BaseModel):
+    query: str
+    results: List[SearchResult]
+
+class BatchSearchResponse(BaseModel):
+    results: List[QueryResults]
+
 @router.post("", response_model=SearchResponse)
 async def search_documents(request: SearchRequest):
     """Search documents using semantic search with optional keyword-based reranking.
@@ -57,112 +136,410 @@ async def search_documents(request: SearchRequest):
     1. Convert query to embedding using OpenAI API
     2. Find similar documents using ChromaDB vector search
     3. If rerank=True:
-       - Get more initial results (3x requested limit, max 20)
+       - Get more initial results (RERANK_CANDIDATES, default 100)
        - Score documents using both semantic and keyword matching
-       - Keyword score = % of query words present in document
+       - Keyword score = % of query words present in document (words are
+         stored with each chunk at ingest, see modules/keywords.py)
        - Final score = (0.7 * semantic_score) + (0.3 * keyword_score)
        - Return top K reranked results
     4. If rerank=False:
        - Return raw semantic search results
        - Similarity scores based on vector distances only
+    5. If hybrid=True (rerank is ignored):
+       - Get HYBRID_CANDIDATES hits from both the vector store and the BM25
+         lexical index (see modules/lexical_index.py)
+       - Fuse both rankings with reciprocal rank fusion (k=60)
+       - Similarity = fused score, 1 for a chunk ranked first by both
+    
+    Results are cached until the collection changes (see modules/search_cache.py).
+
+    filters narrow the vector query itself (ChromaDB where clause): exact
+    source, source prefix (a directory is matched on the directories stored
+    with each chunk, other prefixes are looked up in the documents manifest),
+    embedded_at range and the S3 object's user metadata (tags). Chunks
+    written before dates, directories and tags were stored with them don't
+    match those filters.
+
+    min_similarity drops vector hits below a cosine similarity before any
+    scoring, computed from the raw distance, not the per-query normalized
+    score. In hybrid mode it only applies to the vector side.
+
+    With paginate=True, up to SEARCH_MAX_RESULTS results are ranked at once
+    and the first `limit` are returned with a next_cursor for
+    /api/v1/search/page. Paginated searches skip the results cache.
     """
     try:
-        # Only use initial_limit if reranking
-        initial_limit = min(request.limit * 3, 20) if request.rerank else request.limit
-        logger.debug(f"Using initial limit of {initial_limit} for query: {request.query}")
-        
-        query_embedding = get_query_embedding(request.query)
-        logger.debug(f"Got embeddings of length {len(query_embedding)}")
-        
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=initial_limit
-        )
-        logger.debug(f"Raw query returned {len(results['documents'][0])} results")
-
-        if not request.rerank:
-            # Normalize distances to 0-1 range first
-            max_dist = max(results['distances'][0])
-            min_dist = min(results['distances'][0])
-            normalized_distances = [(d - min_dist) / (max_dist - min_dist) for d in results['distances'][0]]
-            
-            # Then convert to similarities
-            search_results = [
-                SearchResult(
-                    text=doc,
-                    metadata=meta,
-                    similarity=1 - norm_dist  # Now this will be between 0 and 1
-                )
-                for doc, meta, norm_dist in zip(
-                    results['documents'][0],
-                    results['metadatas'][0],
-                    normalized_distances
-                )
-            ]
-            logger.debug("Skipping reranking as rerank=False")
-            return SearchResponse(results=search_results)
+        if request.paginate:
+            return await _first_page(request)
 
-        # Rest of reranking logic only runs if rerank=True
-        query_words = set(request.query.lower().split())
-        logger.debug(f"Query words: {query_words}")
-        
-        # Calculate basic keyword scores
-        keyword_scores = []
-        for doc in results['documents'][0]:
-            doc_words = set(doc.lower().split())
-            # What percent of query words appear in doc
-            score = len(query_words & doc_words) / len(query_words)
-            keyword_scores.append(score)
-            logger.debug(f"Document keyword score: {score:.3f} - First 50 chars: {doc[:50]}...")
-        
-        # Rest same as before but with simpler scoring
-        logger.debug(f"Raw distances: {[f'{dist:.3f}' for dist in results['distances'][0]]}")
-        
-        # Normalize distances to 0-1 range
-        max_dist = max(results['distances'][0])
-        min_dist = min(results['distances'][0])
-        normalized_distances = [(d - min_dist) / (max_dist - min_dist) for d in results['distances'][0]]
-        
-        # Convert normalized distances to similarities
-        semantic_scores = [1 - dist for dist in normalized_distances]
-        logger.debug(f"Normalized distances: {[f'{dist:.3f}' for dist in normalized_distances]}")
-        logger.debug(f"Semantic scores: {[f'{score:.3f}' for score in semantic_scores]}")
-        
-        final_scores = [
-            0.7 * sem_score + 0.3 * key_score
-            for sem_score, key_score in zip(semantic_scores, keyword_scores)
-        ]
-        logger.debug(f"Combined final scores: {[f'{score:.3f}' for score in final_scores]}")
-        
-        # Sort by combined score and take top k
-        sorted_indices = sorted(
-            range(len(final_scores)), 
-            key=lambda i: final_scores[i], 
-            reverse=True
-        )[:request.limit]
-        logger.debug(f"Top {len(sorted_indices)} indices selected: {sorted_indices}")
-        
-        # Format response with reranked results
-        search_results = [
-            SearchResult(
-                text=results['documents'][0][idx],
-                metadata=results['metadatas'][0][idx],
-                similarity=final_scores[idx]
-            )
-            for idx in sorted_indices
-        ]
-        logger.debug(f"Returning {len(search_results)} results")
-        
+        # Read the version first: if the collection changes mid-search, these
+        # results get cached under the old version and are never served
+        version = collection_version.current()
+        cache_key = search_cache.make_key(request.query, version, **_cache_params(request))
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Search cache hit for query: %s", request.query)
+            return SearchResponse(results=cached)
+
+        search_results = [result for _, result in await _search(request, request.limit)]
+        search_cache.put(cache_key, search_results, size=_results_size(search_results))
         return SearchResponse(results=search_results)
         
     except Exception as e:
-        logger.error("Search failed: %s", str(e))
+        raise _search_error(e)
+
+@router.post("/batch", response_model=BatchSearchResponse)
+async def search_documents_batch(request: BatchSearchRequest):
+    """Run several searches with one embedding request and one vector query.
+
+    Queries already in the search cache are answered from it. The rest are
+    embedded together (query embeddings cached earlier are reused), sent to
+    ChromaDB as a single query, and ranked the same way as /api/v1/search.
+    Results come back in the order of the queries.
+    """
+    try:
+        version = collection_version.current()
+        params = _cache_params(request)
+        cache_keys = [search_cache.make_key(query, version, **params) for query in request.queries]
+        results_by_key = {}
+        misses = {}
+        for query, cache_key in zip(request.queries, cache_keys):
+            if cache_key in results_by_key or cache_key in misses:
+                continue
+            cached = search_cache.get(cache_key)
+            if cached is not None:
+                results_by_key[cache_key] = cached
+            else:
+                misses[cache_key] = query
+        logger.debug("Batch search: %d queries, %d cached, %d to run",
+            len(request.queries), len(results_by_key), len(misses))
+
+        where = await _build_where(request.filters) if misses else None
+        if misses and where is _NO_MATCHES:
+            results_by_key.update((cache_key, []) for cache_key in misses)
+        elif misses:
+            queries = list(misses.values())
+            query_embeddings = await get_query_embeddings_async(queries)
+            results = await run_blocking(
+                collection.query,
+                query_embeddings=query_embeddings,
+                n_results=_initial_limit(request.limit, request.rerank, request.hybrid),
+                where=where
+            )
+            for i, (cache_key, query) in enumerate(misses.items()):
+                ranked = await _query_results(
+                    query, results, i, request.limit,
+                    rerank=request.rerank, hybrid=request.hybrid, where=where, min_similarity=request.min_similarity
+                )
+                search_results = [result for _, result in ranked]
+                search_cache.put(cache_key, search_results, size=_results_size(search_results))
+                results_by_key[cache_key] = search_results
+
+        return BatchSearchResponse(results=[
+            QueryResults(query=query, results=results_by_key[cache_key])
+            for query, cache_key in zip(request.queries, cache_keys)
+        ])
+
+    except Exception as e:
+        raise _search_error(e)
+
+@router.post("/page", response_model=SearchResponse)
+async def search_next_page(request: PageRequest):
+    """Get the next page of a paginated search.
+
+    The ranked results were kept when the search ran (see
+    modules/search_cursors.py), so this only reads the page's chunks from
+    ChromaDB by id. Cursors expire SEARCH_CURSOR_TTL_SECONDS after their
+    last use, after which the search has to be run again.
+    """
+    cursor_id, _, offset = request.cursor.partition(":")
+    if not offset.isdigit():
         raise HTTPException(
-            status_code=500,
+            status_code=400,
             detail={
                 "error": {
-                    "code": ErrorCode.PROCESSING_ERROR,
-                    "message": f"Search failed: {str(e)}"
+                    "code": ErrorCode.INVALID_REQUEST,
+                    "message": "Invalid cursor"
                 }
             }
-        ) 
\ No newline at end of file
+        )
+    cursor = search_cursors.get(cursor_id)
+    if cursor is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "code": ErrorCode.NOT_FOUND,
+                    "message": "Cursor expired or not found, run the search again"
+                }
+            }
+        )
+
+    try:
+        start = int(offset)
+        page = cursor.hits[start:start + cursor.page_size]
+        chunks = {}
+        if page:
+            fetched = await run_blocking(
+                collection.get, ids=[chunk_id for chunk_id, _ in page], include=['documents', 'metadatas']
+            )
+            chunks = dict(zip(fetched['ids'], zip(fetched['documents'], fetched['metadatas'])))
+
+        # Chunks deleted since the search ran are left out
+        search_results = [
+            SearchResult(text=chunks[chunk_id][0], metadata=_public_metadata(chunks[chunk_id][1]), similarity=score)
+            for chunk_id, score in page
+            if chunk_id in chunks
+        ]
+        return SearchResponse(
+            results=search_results,
+            next_cursor=_next_cursor(cursor_id, start + cursor.page_size, len(cursor.hits))
+        )
+
+    except Exception as e:
+        raise _search_error(e)
+
+async def _first_page(request: SearchRequest) -> SearchResponse:
+    """Rank up to SEARCH_MAX_RESULTS results, keep them for later pages and return the first."""
+    ranked = await _search(request, max(request.limit, SEARCH_MAX_RESULTS))
+    next_cursor = None
+    if len(ranked) > request.limit:
+        hits = [(chunk_id, result.similarity) for chunk_id, result in ranked]
+        cursor_id = search_cursors.create(hits, page_size=request.limit)
+        next_cursor = _next_cursor(cursor_id, request.limit, len(hits))
+    return SearchResponse(results=[result for _, result in ranked[:request.limit]], next_cursor=next_cursor)
+
+def _next_cursor(cursor_id: str, start: int, total: int) -> Optional[str]:
+    """Get the cursor of the page starting at start, or None past the last result."""
+    return f"{cursor_id}:{start}" if start < total else None
+
+def _search_error(e: Exception) -> HTTPException:
+    """Log a failed search and turn it into the API error (429 when rate limited)."""
+    if isinstance(e, HTTPException):
+        return e
+    logger.error("Search failed: %s", str(e))
+    is_rate_limited = getattr(e, 'status_code', None) == 429
+    return HTTPException(
+        status_code=429 if is_rate_limited else 500,
+        detail={
+            "error": {
+                "code": ErrorCode.RATE_LIMITED if is_rate_limited else ErrorCode.PROCESSING_ERROR,
+                "message": f"Search failed: {str(e)}"
+            }
+        }
+    )
+
+def _cache_params(request: SearchRequest | BatchSearchRequest) -> dict:
+    """Search options that change results, for the search cache key."""
+    return {
+        "limit": request.limit,
+        "rerank": request.rerank,
+        "hybrid": request.hybrid,
+        "filters": request.filters.model_dump() if request.filters else None,
+        "min_similarity": request.min_similarity,
+    }
+
+async def _build_where(filters: Optional[SearchFilters]) -> Optional[dict]:
+    """Turn search filters into a ChromaDB where clause (None without filters).
+
+    Returns _NO_MATCHES when a source prefix matches no documents.
+
+    Raises:
+        HTTPException: 400 if a source prefix that isn't a directory matches
+            more than SEARCH_PREFIX_MAX_KEYS documents
+    """
+    if filters is None:
+        return None
+
+    conditions = []
+    if filters.source is not None:
+        conditions.append({"source": filters.source})
+    if filters.source_prefix and filters.source_prefix.endswith("/"):
+        # Chunks store the directories of their source, one field per depth
+        conditions.append({f"{DIR_PREFIX}{filters.source_prefix.count('/')}": filters.source_prefix})
+    elif filters.source_prefix:
+        # Chroma can't match metadata by prefix, resolve it to keys with the manifest
+        async with AsyncSessionLocal() as db:
+            keys = await DocumentRepository(db).list_keys_with_prefix(
+                filters.source_prefix, limit=SEARCH_PREFIX_MAX_KEYS + 1
+            )
+        if not keys:
+            return _NO_MATCHES
+        if len(keys) > SEARCH_PREFIX_MAX_KEYS:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": {
+                        "code": ErrorCode.INVALID_REQUEST,
+                        "message": f"source_prefix matches more than {SEARCH_PREFIX_MAX_KEYS} documents, "
+                            "use a longer prefix or a directory (ending with '/')"
+                    }
+                }
+            )
+        conditions.append({"source": {"$in": keys}})
+    if filters.embedded_after is not None:
+        conditions.append({"embedded_at_ts": {"$gte": embedded_at_timestamp(filters.embedded_after)}})
+    if filters.embedded_before is not None:
+        conditions.append({"embedded_at_ts": {"$lt": embedded_at_timestamp(filters.embedded_before)}})
+    for name, value in filters.tags.items():
+        conditions.append({f"{TAG_PREFIX}{name.lower()}": value})
+
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+def _results_size(search_results: List[SearchResult]) -> int:
+    """Approximate memory use of results, for the search cache's budget."""
+    return sum(len(r.text) + len(str(r.metadata)) for r in search_results)
+
+def _initial_limit(limit: int, rerank: bool, hybrid: bool) -> int:
+    """Number of candidates to fetch from the vector store (more when reranking or fusing)."""
+    if hybrid:
+        return max(limit, HYBRID_CANDIDATES)
+    return max(limit, RERANK_CANDIDATES) if rerank else limit
+
+async def _search(request: SearchRequest, limit: int) -> List[tuple[str, SearchResult]]:
+    """Run a search without the cache (embedding, vector query, optional rerank).
+
+    Returns the top limit (chunk id, result) pairs, best first.
+    """
+    where = await _build_where(request.filters)
+    if where is _NO_MATCHES:
+        logger.debug(f"No documents match the filters for query: {request.query}")
+        return []
+
+    # Only use initial_limit if reranking
+    initial_limit = _initial_limit(limit, request.rerank, request.hybrid)
+    logger.debug(f"Using initial limit of {initial_limit} for query: {request.query}")
+    
+    query_embedding = await get_query_embedding_async(request.query)
+    logger.debug(f"Got embeddings of length {len(query_embedding)}")
+    
+    results = await run_blocking(
+        collection.query,
+        query_embeddings=[query_embedding],
+        n_results=initial_limit,
+        where=where
+    )
+    return await _query_results(
+        request.query, results, 0, limit,
+        rerank=request.rerank, hybrid=request.hybrid, where=where, min_similarity=request.min_similarity
+    )
+
+async def _query_results(
+    query: str,
+    results: dict,
+    i: int,
+    limit: int,
+    rerank: bool,
+    hybrid: bool,
+    where: Optional[dict] = None,
+    min_similarity: Optional[float] = None
+) -> List[tuple[str, SearchResult]]:
+    """Score the hits of the i-th query embedding of a collection.query call."""
+    hits = list(zip(results['ids'][i], results['documents'][i], results['metadatas'][i], results['distances'][i]))
+    if min_similarity is not None:
+        # Embeddings are unit length, so the (squared L2) distance is 2 - 2 * cosine similarity
+        max_distance = 2 * (1 - min_similarity)
+        hits = [hit for hit in hits if hit[3] <= max_distance]
+        logger.debug(f"{len(hits)} hits within similarity {min_similarity}")
+    ids, documents, metadatas, distances = (list(column) for column in zip(*hits)) if hits else ([], [], [], [])
+
+    if hybrid:
+        return await _fuse_results(query, ids, documents, metadatas, limit, where)
+    return _rank_results(query, ids, documents, metadatas, distances, limit, rerank)
+
+async def _fuse_results(
+    query: str,
+    ids: List[str],
+    documents: List[str],
+    metadatas: List[dict],
+    limit: int,
+    where: Optional[dict] = None
+) -> List[tuple[str, SearchResult]]:
+    """Fuse vector hits with BM25 hits for the same query by reciprocal rank fusion."""
+    lexical_hits = await run_blocking(lexical_index.search, query, max(limit, HYBRID_CANDIDATES))
+    lexical_ids = [chunk_id for chunk_id, _ in lexical_hits]
+    logger.debug(f"Hybrid search: {len(ids)} vector hits, {len(lexical_ids)} lexical hits")
+
+    chunks = {chunk_id: (doc, meta) for chunk_id, doc, meta in zip(ids, documents, metadatas)}
+    if where is not None and lexical_ids:
+        # The lexical index doesn't know chunk metadata, keep the hits that pass the filters
+        fetched = await run_blocking(collection.get, ids=lexical_ids, where=where, include=['documents', 'metadatas'])
+        chunks.update(zip(fetched['ids'], zip(fetched['documents'], fetched['metadatas'])))
+        lexical_ids = [chunk_id for chunk_id in lexical_ids if chunk_id in chunks]
+
+    scores = {}
+    for ranking in (ids, lexical_ids):
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (RRF_K + rank)
+    # Stable sort, so ties keep the vector search order
+    top_ids = sorted(scores, key=scores.get, reverse=True)[:limit]
+
+    # Chunks only found by the lexical index still need their text
+    lexical_only = [chunk_id for chunk_id in top_ids if chunk_id not in chunks]
+    if lexical_only:
+        fetched = await run_blocking(collection.get, ids=lexical_only, include=['documents', 'metadatas'])
+        chunks.update(zip(fetched['ids'], zip(fetched['documents'], fetched['metadatas'])))
+
+    best_score = 2 / (RRF_K + 1)
+    return [
+        (chunk_id, SearchResult(
+            text=chunks[chunk_id][0],
+            metadata=_public_metadata(chunks[chunk_id][1]),
+            similarity=scores[chunk_id] / best_score
+        ))
+        for chunk_id in top_ids
+        if chunk_id in chunks
+    ]
+
+def _rank_results(
+    query: str,
+    ids: List[str],
+    documents: List[str],
+    metadatas: List[dict],
+    distances: List[float],
+    limit: int,
+    rerank: bool
+) -> List[tuple[str, SearchResult]]:
+    """Turn one query's vector search hits into scored (chunk id, result) pairs, reranked if asked."""
+    logger.debug(f"Raw query returned {len(documents)} results")
+    if not documents:
+        return []
+
+    # Normalize distances to 0-1 range (all hits equally close count as a perfect match)
+    distances = np.asarray(distances, dtype=float)
+    dist_range = (distances.max() - distances.min()) or 1.0
+    normalized_distances = (distances - distances.min()) / dist_range
+    # Then convert to similarities
+    semantic_scores = 1 - normalized_distances
+
+    if not rerank:
+        logger.debug("Skipping reranking as rerank=False")
+        return [
+            (chunk_id, SearchResult(text=doc, metadata=_public_metadata(meta), similarity=float(score)))
+            for chunk_id, doc, meta, score in zip(ids, documents, metadatas, semantic_scores)
+        ]
+
+    # What percent of query words appear in each candidate, from the terms stored at ingest
+    keyword = keyword_scores(query, documents, [meta.get("terms") for meta in metadatas])
+    final_scores = 0.7 * semantic_scores + 0.3 * keyword
+    logger.debug(f"Reranked {len(documents)} candidates, top combined scores: "
+        f"{[f'{score:.3f}' for score in np.sort(final_scores)[::-1][:limit]]}")
+
+    # Sort by combined score and take top k (stable, so ties keep the vector search order)
+    top_indices = np.argsort(-final_scores, kind="stable")[:limit]
+    search_results = [
+        (ids[idx], SearchResult(
+            text=documents[idx],
+            metadata=_public_metadata(metadatas[idx]),
+            similarity=float(final_scores[idx])
+        ))
+        for idx in top_indices
+    ]
+    logger.debug(f"Returning {len(search_results)} results")
+    return search_results
+
+def _public_metadata(metadata: dict) -> dict:
+    """Drop internal fields (stored terms) from a chunk's metadata."""
+    return {key: value for key, value in metadata.items() if key != "terms"}
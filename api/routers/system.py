@@ -0,0 +1,83 @@
+from fastapi import APIRouter
+from pydantic import BaseModel
+from modules.embeddings import scheduler
+from modules.embedding_cache import embedding_cache, query_embedding_cache
+from modules.concurrency import run_blocking
+from modules.search_cache import search_cache
+from modules.collection_version import collection_version
+from modules.lexical_index import lexical_index
+
+router = APIRouter(prefix="/api/v1/system", tags=["system"])
+
+class EmbeddingStats(BaseModel):
+    scheduler: dict
+    cache: dict
+    query_cache: dict
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "scheduler": {
+                    "retries": 0,
+                    "rate_limited": 0,
+                    "requests_available": 2990.0,
+                    "tokens_available": 998500.0,
+                    "max_concurrency": 8,
+                    "reserved_search_slots": 2,
+                    "lanes": {
+                        "search": {"queued": 0, "in_flight": 1, "requests": 42, "avg_wait_seconds": 0.001, "max_wait_seconds": 0.02},
+                        "ingest": {"queued": 3, "in_flight": 6, "requests": 310, "avg_wait_seconds": 0.4, "max_wait_seconds": 2.1}
+                    }
+                },
+                "cache": {"hits": 1200, "misses": 300, "hit_ratio": 0.8, "entries": 1500, "bytes": 18432000, "max_bytes": 1073741824, "ttl_seconds": 0},
+                "query_cache": {"hits": 640, "misses": 160, "hit_ratio": 0.8, "entries": 410, "bytes": 2519040, "max_bytes": 67108864, "ttl_seconds": 2592000}
+            }
+        }
+
+@router.get("/embeddings", response_model=EmbeddingStats)
+async def get_embedding_stats():
+    """Get per-lane queue depth and wait times, rate budget and chunk and query embedding cache stats.
+
+    Hit/miss counters are per worker process, sizes cover the shared cache file.
+    """
+    return EmbeddingStats(
+        scheduler=scheduler.stats(),
+        cache=await run_blocking(embedding_cache.stats),
+        query_cache=await run_blocking(query_embedding_cache.stats)
+    )
+
+
+class SearchCacheStats(BaseModel):
+    collection_version: str
+    cache: dict
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "collection_version": "4f7d0c2b9e8a4e1f8a3c5d6b7e9f0a1b",
+                "cache": {"hits": 950, "misses": 50, "hit_ratio": 0.95, "entries": 48, "bytes": 412000, "max_bytes": 67108864}
+            }
+        }
+
+@router.get("/search-cache", response_model=SearchCacheStats)
+async def get_search_cache_stats():
+    """Get search result cache hit ratio and memory use, and the current collection version."""
+    return SearchCacheStats(
+        collection_version=collection_version.current(),
+        cache=search_cache.stats()
+    )
+
+class LexicalIndexStats(BaseModel):
+    chunks: int
+    terms: int
+    avg_chunk_length: float
+
+    class Config:
+        json_schema_extra = {
+            "example": {"chunks": 5812, "terms": 48213, "avg_chunk_length": 412.7}
+        }
+
+@router.get("/lexical-index", response_model=LexicalIndexStats)
+async def get_lexical_index_stats():
+    """Get the size of the BM25 index used by hybrid search."""
+    return LexicalIndexStats(**await run_blocking(lexical_index.stats))
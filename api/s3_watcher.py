@@ -0,0 +1,151 @@
+import asyncio
+import urllib.parse
+from typing import Any, Callable, Optional
+
+from .database import AsyncSessionLocal
+from .job_queue import job_queue
+from .repositories.job_repository import JobRepository
+from .repositories.document_repository import DocumentRepository, is_document_unchanged
+from .repositories.watch_checkpoint_repository import WatchCheckpointRepository
+from .schemas.job import JobCreate
+from modules.s3_connection import get_s3_client, list_objects_page, encode_key
+from modules.concurrency import run_blocking, ingest_executor
+from modules.env import WATCH_INTERVAL_SECONDS, WATCH_PAGES_PER_POLL
+from modules.logger import logger
+
+# Pause between polls while a pass over the bucket is still in progress
+PASS_CONTINUE_DELAY_SECONDS = 1.0
+
+class S3Watcher:
+    """Polls a bucket prefix and queues jobs for new, changed and deleted files.
+
+    Each poll lists at most pages_per_poll pages (1000 keys each), starting
+    after the key stored in the watch_checkpoints table, so a poll costs the
+    same on a bucket with a million objects as on one with ten thousand. A
+    full pass over the prefix is spread over several polls, and the next
+    pass starts once the listing runs out.
+
+    A page is compared against the documents manifest for the same key range:
+    listed files whose ETag differs from the manifest are queued for
+    processing, and manifest entries that aren't listed anymore are queued
+    for removal. Files that already have a queued or running job are left
+    alone.
+
+    The S3 client and the session factory can be swapped, e.g. for a moto
+    client or a MinIO endpoint and a test database.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        interval_seconds: float = WATCH_INTERVAL_SECONDS,
+        pages_per_poll: int = WATCH_PAGES_PER_POLL,
+        s3_client: Optional[Any] = None,
+        session_factory: Callable = AsyncSessionLocal,
+        notify: Callable[[], None] = job_queue.notify,
+    ):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.interval_seconds = interval_seconds
+        self.pages_per_poll = pages_per_poll
+        self.s3_client = s3_client or get_s3_client()
+        self.session_factory = session_factory
+        self.notify = notify
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start polling in the background."""
+        self._task = asyncio.create_task(self._run())
+        logger.info("Watching s3://%s/%s every %ss", self.bucket, self.prefix, self.interval_seconds)
+
+    async def stop(self) -> None:
+        """Stop polling (a poll in progress is abandoned, its checkpoint isn't saved)."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            pass_complete = True
+            try:
+                result = await self.poll_once()
+                pass_complete = result["pass_complete"]
+            except Exception as e:
+                logger.error("S3 watcher poll of %s failed: %s", self.bucket, str(e))
+            await asyncio.sleep(self.interval_seconds if pass_complete else PASS_CONTINUE_DELAY_SECONDS)
+
+    async def poll_once(self) -> dict:
+        """List the next pages after the checkpoint and queue jobs for what changed.
+
+        Returns:
+            dict: Counts of keys listed, files queued for processing and for
+            removal, and whether this poll finished a pass over the prefix
+        """
+        result = {"listed": 0, "queued": 0, "deleted": 0, "pass_complete": False}
+        async with self.session_factory() as db:
+            checkpoints = WatchCheckpointRepository(db)
+            checkpoint = await checkpoints.get(self.bucket, self.prefix)
+            start_after = checkpoint.start_after if checkpoint else None
+
+            for _ in range(self.pages_per_poll):
+                objects, next_token = await run_blocking(
+                    list_objects_page, self.bucket, self.prefix, self.s3_client, None, start_after,
+                    executor=ingest_executor
+                )
+                # The page covers keys in (start_after, upto], or everything after start_after on the last page
+                upto = objects[-1]["key"] if next_token and objects else None
+                queued, deleted = await self._diff_page(db, objects, start_after, upto)
+                result["listed"] += len(objects)
+                result["queued"] += queued
+                result["deleted"] += deleted
+                start_after = upto
+                if upto is None:
+                    result["pass_complete"] = True
+                    break
+
+            await checkpoints.save(self.bucket, self.prefix, start_after)
+            await db.commit()
+
+        if result["queued"] or result["deleted"]:
+            self.notify()
+            logger.info("S3 watcher queued %d changed and %d deleted files in %s",
+                result["queued"], result["deleted"], self.bucket)
+        return result
+
+    async def _diff_page(self, db, objects: list[dict], after: Optional[str], upto: Optional[str]) -> tuple[int, int]:
+        """Queue jobs for one page of the listing. Returns (files queued, files queued for removal)."""
+        jobs = JobRepository(db)
+        documents = DocumentRepository(db)
+
+        files = [obj for obj in objects if obj["key"].lower().endswith('.md')]
+        keys = [encode_key(obj["key"]) for obj in files]
+        known = await documents.get_many(keys)
+
+        # Manifest keys are stored URL encoded, the listing has raw keys
+        listed = {obj["key"] for obj in objects}
+        missing = [
+            key for key in await documents.list_keys_between(self.bucket, self.prefix, after, upto)
+            if urllib.parse.unquote_plus(key) not in listed
+        ]
+
+        pending = await jobs.pending_keys(self.bucket, keys + missing)
+
+        queued = 0
+        for key, obj in zip(keys, files):
+            document = known.get(key)
+            if key in pending or is_document_unchanged(document, obj):
+                continue
+            await jobs.create(JobCreate(bucket=self.bucket, key=key, force_reload=document is not None))
+            queued += 1
+
+        deleted = 0
+        for key in missing:
+            if key in pending:
+                continue
+            await jobs.create(JobCreate(bucket=self.bucket, key=key, kind="delete"))
+            deleted += 1
+
+        return queued, deleted
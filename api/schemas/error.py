@@ -6,6 +6,7 @@ class ErrorCode(str, Enum):
     INVALID_REQUEST = "invalid_request"
     PROCESSING_ERROR = "processing_error"
     NOT_FOUND = "not_found"
+    RATE_LIMITED = "rate_limited"
     SERVER_ERROR = "server_error"
 
 class ErrorResponse(BaseModel):
@@ -10,6 +10,9 @@ class JobBase(BaseModel):
 class JobCreate(JobBase):
     """Schema for creating a new job."""
     force_reload: bool = False
+    kind: str = "document"
+    pattern: Optional[str] = None
+    concurrency: Optional[int] = None
 
 class JobUpdate(BaseModel):
     """Schema for updating a job."""
@@ -18,6 +21,17 @@ class JobUpdate(BaseModel):
     chunks_processed: Optional[int] = None
     error: Optional[str] = None
 
+class BatchProgress(BaseModel):
+    """Aggregate progress of a batch job."""
+    prefix: str
+    pattern: Optional[str] = None
+    files_total: int = 0
+    files_done: int = 0
+    files_skipped: int = 0
+    files_failed: int = 0
+    files_per_second: float = 0.0
+    chunks_per_second: float = 0.0
+
 class JobResponse(JobBase):
     """Schema for job responses."""
     job_id: str
@@ -26,6 +40,8 @@ class JobResponse(JobBase):
     completed_at: Optional[datetime] = None
     chunks_processed: Optional[int] = None
     error: Optional[str] = None
+    kind: str = "document"
+    progress: Optional[BatchProgress] = None
 
     class Config:
         from_attributes = True 
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""create documents table
+
+Revision ID: 002
+Revises: 001
+Create Date: 2025-01-20
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_table(
+        'documents',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('bucket', sa.String(), nullable=False),
+        sa.Column('chunk_count', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(), nullable=True),
+        sa.Column('etag', sa.String(), nullable=True),
+        sa.Column('embedding_model', sa.String(), nullable=False),
+        sa.Column('embedded_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+def downgrade() -> None:
+    op.drop_table('documents')
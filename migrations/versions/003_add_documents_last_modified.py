@@ -0,0 +1,23 @@
+"""add last_modified to documents
+
+Revision ID: 003
+Revises: 002
+Create Date: 2025-01-21
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('last_modified', sa.DateTime(), nullable=True))
+
+def downgrade() -> None:
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.drop_column('last_modified')
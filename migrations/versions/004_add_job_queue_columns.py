@@ -0,0 +1,31 @@
+"""add job queue columns to jobs
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-01-22
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('force_reload', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('jobs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('jobs', sa.Column('worker_id', sa.String(), nullable=True))
+    op.add_column('jobs', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_jobs_status_created_at', 'jobs', ['status', 'created_at'])
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_status_created_at', table_name='jobs')
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.drop_column('lease_expires_at')
+        batch_op.drop_column('worker_id')
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('force_reload')
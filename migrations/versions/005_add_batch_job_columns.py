@@ -0,0 +1,37 @@
+"""add batch job columns to jobs
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-01-23
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('started_at', sa.DateTime(), nullable=True))
+    op.add_column('jobs', sa.Column('kind', sa.String(), server_default='document', nullable=False))
+    op.add_column('jobs', sa.Column('pattern', sa.String(), nullable=True))
+    op.add_column('jobs', sa.Column('concurrency', sa.Integer(), nullable=True))
+    op.add_column('jobs', sa.Column('files_total', sa.Integer(), nullable=True))
+    op.add_column('jobs', sa.Column('files_done', sa.Integer(), nullable=True))
+    op.add_column('jobs', sa.Column('files_skipped', sa.Integer(), nullable=True))
+    op.add_column('jobs', sa.Column('files_failed', sa.Integer(), nullable=True))
+
+def downgrade() -> None:
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.drop_column('files_failed')
+        batch_op.drop_column('files_skipped')
+        batch_op.drop_column('files_done')
+        batch_op.drop_column('files_total')
+        batch_op.drop_column('concurrency')
+        batch_op.drop_column('pattern')
+        batch_op.drop_column('kind')
+        batch_op.drop_column('started_at')
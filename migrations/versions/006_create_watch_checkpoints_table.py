@@ -0,0 +1,31 @@
+"""create watch_checkpoints table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-01-24
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_table(
+        'watch_checkpoints',
+        sa.Column('bucket', sa.String(), nullable=False),
+        sa.Column('prefix', sa.String(), nullable=False),
+        sa.Column('start_after', sa.String(), nullable=True),
+        sa.Column('pass_started_at', sa.DateTime(), nullable=True),
+        sa.Column('last_pass_completed_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('bucket', 'prefix')
+    )
+
+def downgrade() -> None:
+    op.drop_table('watch_checkpoints')
@@ -0,0 +1,23 @@
+"""add chunking to documents
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-01-25
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('chunking', sa.String(), nullable=True))
+
+def downgrade() -> None:
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.drop_column('chunking')
@@ -0,0 +1,38 @@
+"""add raw_key to documents
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-01-26
+
+"""
+from typing import Sequence, Union
+import urllib.parse
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('raw_key', sa.String(), nullable=True))
+
+    # Keys are stored URL encoded (see encode_key), the raw key is the decoded one
+    conn = op.get_bind()
+    documents = sa.table('documents', sa.column('key', sa.String()), sa.column('raw_key', sa.String()))
+    keys = [row[0] for row in conn.execute(sa.select(documents.c.key))]
+    for key in keys:
+        conn.execute(
+            documents.update().where(documents.c.key == key).values(raw_key=urllib.parse.unquote_plus(key))
+        )
+
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.alter_column('raw_key', existing_type=sa.String(), nullable=False)
+    op.create_index('ix_documents_bucket_raw_key', 'documents', ['bucket', 'raw_key'])
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_bucket_raw_key', table_name='documents')
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.drop_column('raw_key')
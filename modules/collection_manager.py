@@ -1,4 +1,6 @@
 from .logger import logger
+from .collection_version import collection_version
+from .lexical_index import lexical_index
 
 import chromadb
 
@@ -86,6 +88,14 @@ def check_document_exists(collection, doc_id: str) -> bool:
         logger.error(f"Error checking document existence: {str(e)}")
         return False
 
+def get_document_chunk_ids(collection, source: str) -> list[str]:
+    """Get ids of every chunk stored for a source document, in one query."""
+    try:
+        return collection.get(where={"source": source}, include=[])['ids']
+    except Exception as e:
+        logger.error(f"Error getting chunk IDs for {source}: {str(e)}")
+        raise
+
 def get_all_document_ids(collection) -> list[str]:
     """Get list of all document IDs in collection."""
     try:
@@ -98,6 +108,8 @@ def delete_collection(client: chromadb.PersistentClient) -> None:
     """Delete collection if exists."""
     try:
         client.delete_collection("docs")
+        lexical_index.clear()
+        collection_version.bump()
         logger.info("Collection deleted successfully")
     except Exception as e:
         logger.error(f"Failed to delete collection: {str(e)}")
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from modules.logger import logger
+
+class CollectionVersion:
+    """Version token of the vector store, changed on every write.
+
+    The token is a random id in a file next to the Chroma data, so writes
+    from other processes (e.g. scripts/process_docs.py) are seen too. It's
+    replaced atomically, readers never see a partial token.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def current(self) -> str:
+        """Get the current version (reads the file, a few microseconds)."""
+        try:
+            return self.path.read_text().strip()
+        except FileNotFoundError:
+            return self.bump()
+
+    def bump(self) -> str:
+        """Give the collection a new version, invalidating anything cached for the old one."""
+        version = uuid.uuid4().hex
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".version-")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(version)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        logger.debug("Collection version is now %s", version)
+        return version
+
+collection_version = CollectionVersion("./chroma_db/collection_version")
@@ -0,0 +1,72 @@
+import asyncio
+import multiprocessing
+import os
+from functools import partial
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+from modules.env import VECTOR_STORE_WORKERS, INGEST_THREADS, PIPELINE_PROCESS_WORKERS
+from modules.logger import logger
+
+# Bounded pool for blocking vector store and S3 calls made from request
+# handlers, so a slow call can't pile up threads or stall the event loop
+vector_store_executor = ThreadPoolExecutor(
+    max_workers=VECTOR_STORE_WORKERS,
+    thread_name_prefix="vector-store"
+)
+
+# Threads for the blocking stages of processing jobs (S3, embeddings, Chroma),
+# kept apart from the request pool so ingestion can't starve searches
+ingest_executor = ThreadPoolExecutor(
+    max_workers=INGEST_THREADS,
+    thread_name_prefix="ingest"
+)
+
+async def run_blocking(fn: Callable[..., Any], *args, executor: Optional[Executor] = None, **kwargs) -> Any:
+    """Run a blocking call in a thread pool and await its result.
+
+    Args:
+        fn: Blocking function to call
+        executor: Pool to run in (default: vector store pool)
+
+    Returns:
+        Any: Whatever fn returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor or vector_store_executor, partial(fn, *args, **kwargs))
+
+# Processes for CPU-bound pipeline stages (decoding, hashing, splitting), so
+# pure Python string work uses every core and never holds the API's GIL.
+# Created on first use, and again if a worker process dies.
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the pipeline process pool, starting it if needed."""
+    global _process_pool
+    if _process_pool is None:
+        workers = PIPELINE_PROCESS_WORKERS or os.cpu_count() or 1
+        # spawn, not fork: forking a process that runs threads can deadlock the child
+        _process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        logger.info("Started pipeline process pool with %d workers", workers)
+    return _process_pool
+
+async def run_in_process(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a CPU-bound call in the process pool and await its result.
+
+    fn must be a module-level function, and its arguments and result must
+    be picklable.
+    """
+    global _process_pool
+    try:
+        return await run_blocking(fn, *args, executor=get_process_pool(), **kwargs)
+    except BrokenProcessPool:
+        logger.error("Pipeline process pool broke (a worker died), it will be restarted")
+        _process_pool = None
+        raise
+
+def shutdown_process_pool() -> None:
+    """Stop the pipeline process pool, dropping calls that haven't started."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
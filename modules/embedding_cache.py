@@ -0,0 +1,218 @@
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Optional
+from modules.logger import logger
+from modules.hashing import content_hash
+from modules.env import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_MB, QUERY_CACHE_MAX_MB, QUERY_CACHE_TTL_DAYS
+from modules.embedding_conf import EMBEDDING_MODEL, ACTIVE_CONFIG
+from modules.search_cache import query_key
+from modules.sqlite_batches import lookup_batches, placeholders
+
+class SQLiteEmbeddingCache:
+    """Disk-backed embedding cache in one SQLite table, keyed by (model, dimensions, hash of key).
+
+    Vectors are stored as float32 blobs. Entries expire ttl_seconds after
+    they were stored (never if 0), and once the stored vectors go over
+    max_bytes, least recently used entries are evicted first. Subclasses set
+    the table, its key column and how a text is turned into its key.
+    """
+
+    table = "embeddings"
+    key_column = "text_hash"
+    label = "Embedding cache"
+
+    def __init__(self, path: str, max_bytes: int, model: str, dimensions: int, ttl_seconds: float = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.model = model
+        self.dimensions = dimensions
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                model TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                {self.key_column} TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, dimensions, {self.key_column})
+            )
+        """)
+        # Chunk caches created before entries could expire lack created_at
+        columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({self.table})")]
+        if "created_at" not in columns:
+            self._conn.execute(f"ALTER TABLE {self.table} ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.table}_last_used ON {self.table} (last_used)")
+        self._conn.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def key(self, text: str) -> str:
+        """Get the cache key of a text, the text itself unless a subclass normalizes it."""
+        return text
+
+    def get_many(self, texts: list[str]) -> list[Optional[list[float]]]:
+        """Look up cached embeddings, returning None for every miss."""
+        if not self.enabled:
+            self.misses += len(texts)
+            return [None] * len(texts)
+
+        hashes = [content_hash(self.key(t)) for t in texts]
+        unique_hashes = list(dict.fromkeys(hashes))
+        now = time.time()
+        oldest = now - self.ttl_seconds if self.ttl_seconds else 0.0
+        found = {}
+        with self._lock:
+            for batch in lookup_batches(unique_hashes):
+                rows = self._conn.execute(
+                    f"SELECT {self.key_column}, embedding FROM {self.table} "
+                    f"WHERE model = ? AND dimensions = ? AND created_at >= ? AND {self.key_column} IN ({placeholders(batch)})",
+                    (self.model, self.dimensions, oldest, *batch)
+                ).fetchall()
+                for key_hash, blob in rows:
+                    vector = array('f')
+                    vector.frombytes(blob)
+                    found[key_hash] = vector.tolist()
+
+            if found:
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_used = ? WHERE model = ? AND dimensions = ? AND {self.key_column} = ?",
+                    [(now, self.model, self.dimensions, h) for h in found]
+                )
+                self._conn.commit()
+
+        results = [found.get(h) for h in hashes]
+        hit_count = sum(1 for r in results if r is not None)
+        self.hits += hit_count
+        self.misses += len(results) - hit_count
+        logger.debug("%s lookup: %d hits, %d misses", self.label, hit_count, len(results) - hit_count)
+        return results
+
+    def put_many(self, texts: list[str], embeddings: list[list[float]]) -> None:
+        """Store embeddings for texts, evicting expired and old entries if needed."""
+        if not self.enabled or not texts:
+            return
+
+        now = time.time()
+        rows = []
+        for text, embedding in zip(texts, embeddings):
+            blob = array('f', embedding).tobytes()
+            rows.append((self.model, self.dimensions, content_hash(self.key(text)), blob, len(blob), now, now))
+
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} "
+                f"(model, dimensions, {self.key_column}, embedding, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes. Caller holds the lock."""
+        if self.ttl_seconds:
+            expired = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            if expired:
+                logger.info("%s expired %d entries", self.label, expired)
+
+        total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        to_free = total - self.max_bytes
+        freed = 0
+        evict_ids = []
+        for rowid, size in self._conn.execute(f"SELECT rowid, size FROM {self.table} ORDER BY last_used"):
+            evict_ids.append(rowid)
+            freed += size
+            if freed >= to_free:
+                break
+
+        for batch in lookup_batches(evict_ids):
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ({placeholders(batch)})",
+                batch
+            )
+        logger.info("%s evicted %d entries (%d bytes)", self.label, len(evict_ids), freed)
+
+    def clear(self) -> int:
+        """Remove every cached embedding and reset counters. Returns entries removed."""
+        with self._lock:
+            removed = self._conn.execute(f"DELETE FROM {self.table}").rowcount
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        self.hits = 0
+        self.misses = 0
+        logger.info("%s cleared (%d entries)", self.label, removed)
+        return removed
+
+    def stats(self) -> dict:
+        """Get hit/miss counters (this process) and current size (all processes)."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+class EmbeddingCache(SQLiteEmbeddingCache):
+    """Disk-backed cache of document chunk embeddings, keyed by the chunk text."""
+
+class QueryEmbeddingCache(SQLiteEmbeddingCache):
+    """Disk-backed cache of search query embeddings, shared by every process on the host.
+
+    Lives in the same SQLite file as the chunk cache, in its own table. Queries
+    are looked up case-insensitively (see key), so every spelling of a query
+    maps to the vector of the first one that was embedded.
+    """
+
+    table = "query_embeddings"
+    key_column = "query_hash"
+    label = "Query embedding cache"
+
+    def key(self, query: str) -> str:
+        """Get the cache key of a query: Unicode, whitespace and case normalized (see query_key)."""
+        return query_key(query)
+
+# Ollama's batch embed API returns normalized vectors, unlike the old
+# per-prompt API, so keep those entries apart from anything cached before
+_cache_model = EMBEDDING_MODEL if ACTIVE_CONFIG["provider"] == "openai" else f"{EMBEDDING_MODEL}/embed"
+
+embedding_cache = EmbeddingCache(
+    EMBEDDING_CACHE_PATH,
+    max_bytes=EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+    model=_cache_model,
+    dimensions=ACTIVE_CONFIG["dimensions"],
+)
+
+query_embedding_cache = QueryEmbeddingCache(
+    EMBEDDING_CACHE_PATH,
+    max_bytes=QUERY_CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=QUERY_CACHE_TTL_DAYS * 24 * 3600,
+    model=_cache_model,
+    dimensions=ACTIVE_CONFIG["dimensions"],
+)
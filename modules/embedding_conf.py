@@ -1,47 +1,73 @@
 from modules.env import EMBEDDING_MODEL
 
+# chunk_size caps the pieces the splitter cuts text into (characters),
+# chunk_tokens caps the chunks neighboring pieces are packed into (tokens)
 MODEL_CONFIGS = {
     "text-embedding-3-large": {
         "provider": "openai",
         "max_tokens": 8191,
         "chunk_size": 3000,
+        "chunk_tokens": 750,
         "dimensions": 3072,
+        # OpenAI per-request limits: 2048 inputs, 300k tokens
+        "batch_size": 2048,
+        "max_batch_tokens": 300000,
+        # Tier 1 rate limits, override with EMBEDDING_RPM / EMBEDDING_TPM
+        "rpm": 3000,
+        "tpm": 1000000,
     },
     "text-embedding-3-small": {
         "provider": "openai",
         "max_tokens": 8191,
         "chunk_size": 2000,
+        "chunk_tokens": 500,
         "dimensions": 1536,
+        # OpenAI per-request limits: 2048 inputs, 300k tokens
+        "batch_size": 2048,
+        "max_batch_tokens": 300000,
+        # Tier 1 rate limits, override with EMBEDDING_RPM / EMBEDDING_TPM
+        "rpm": 3000,
+        "tpm": 1000000,
     },
     "bge-m3": {
         "provider": "ollama",
         "max_tokens": 2048,
         "chunk_size": 1000,
+        "chunk_tokens": 250,
         "dimensions": 1024,
+        "batch_size": 32,
     },
     "nomic-embed-text": {
         "provider": "ollama",
         "max_tokens": 8192,
         "chunk_size": 2048,
+        "chunk_tokens": 512,
         "dimensions": 768,
+        "batch_size": 32,
     },
     "mxbai-embed-large": {
         "provider": "ollama",
         "max_tokens": 8192,
         "chunk_size": 2048,
+        "chunk_tokens": 512,
         "dimensions": 1024,
+        "batch_size": 32,
     },
     "snowflake-arctic-embed": {
         "provider": "ollama",
         "max_tokens": 8192,
         "chunk_size": 2048,
+        "chunk_tokens": 512,
         "dimensions": 768,
+        "batch_size": 32,
     },
     "all-minilm": {
         "provider": "ollama",
         "max_tokens": 8192,
         "chunk_size": 2048,
+        "chunk_tokens": 512,
         "dimensions": 384,
+        "batch_size": 32,
     },
 }
 
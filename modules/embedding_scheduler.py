@@ -0,0 +1,271 @@
+import asyncio
+import math
+import random
+import threading
+import time
+from enum import Enum
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+import httpx
+import openai
+from modules.logger import logger
+
+# Status codes worth retrying: timeouts, conflicts, rate limits, server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# How often waiters re-check for a free concurrency slot
+_SLOT_POLL_INTERVAL = 0.02
+
+class Lane(str, Enum):
+    """Priority class of an embedding call. Search always goes first."""
+    SEARCH = "search"
+    INGEST = "ingest"
+
+class LaneStats:
+    """Queue depth and wait time counters for one lane."""
+
+    def __init__(self):
+        self.queued = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "avg_wait_seconds": self.total_wait / self.requests if self.requests else 0.0,
+            "max_wait_seconds": self.max_wait,
+        }
+
+class TokenBucket:
+    """Token bucket that refills per_minute units per minute, up to per_minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.available = per_minute
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float, reserve: float = 0.0) -> float:
+        """Seconds until amount can be taken while leaving reserve untouched."""
+        self._refill(now)
+        # A single request bigger than the bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity - reserve)
+        if self.available - amount >= reserve:
+            return 0.0
+        return (amount + reserve - self.available) / self.rate
+
+    def take(self, amount: float, reserve: float = 0.0) -> None:
+        self.available -= min(amount, self.capacity - reserve)
+
+class EmbeddingScheduler:
+    """Rate limits, prioritizes and retries embedding calls for one model.
+
+    Every call waits for a concurrency slot, a request slot (requests per
+    minute) and enough token budget (tokens per minute). Calls are split into
+    lanes: search calls can use the whole budget and go first whenever they
+    are waiting, while ingestion calls can't touch the share reserved for
+    search (search_reserve of the rate budget and of the concurrency slots).
+
+    Retryable failures back off with jittered exponential delays, or the
+    server's Retry-After hint when given, and pause every other caller for
+    the same time.
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        max_concurrency: int = 8,
+        search_reserve: float = 0.2,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.search_reserve = search_reserve
+        # Always leave at least one slot for search, and at least one for ingestion
+        self.reserved_slots = min(max(1, math.ceil(max_concurrency * search_reserve)), max_concurrency - 1)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.rate_limited = 0
+        self.lanes = {lane: LaneStats() for lane in Lane}
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, lane: Lane, tokens: int) -> float:
+        """Take budget for one request if available, else return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            is_search = lane == Lane.SEARCH
+            in_flight = sum(stats.in_flight for stats in self.lanes.values())
+
+            if is_search:
+                has_slot = in_flight < self.max_concurrency
+            else:
+                has_slot = (
+                    in_flight < self.max_concurrency - self.reserved_slots
+                    and self.lanes[Lane.SEARCH].queued == 0
+                )
+            wait = self._blocked_until - now
+            if not has_slot:
+                wait = max(wait, _SLOT_POLL_INTERVAL)
+
+            request_reserve = 0.0 if is_search or not self.requests else self.requests.capacity * self.search_reserve
+            token_reserve = 0.0 if is_search or not self.tokens else self.tokens.capacity * self.search_reserve
+            if self.requests:
+                wait = max(wait, self.requests.wait_time(1, now, request_reserve))
+            if self.tokens:
+                wait = max(wait, self.tokens.wait_time(tokens, now, token_reserve))
+            if wait > 0:
+                return wait
+
+            if self.requests:
+                self.requests.take(1, request_reserve)
+            if self.tokens:
+                self.tokens.take(tokens, token_reserve)
+            self.lanes[lane].in_flight += 1
+            return 0.0
+
+    def _start_waiting(self, lane: Lane) -> float:
+        with self._lock:
+            self.lanes[lane].queued += 1
+        return time.monotonic()
+
+    def _stop_waiting(self, lane: Lane, started: float) -> None:
+        waited = time.monotonic() - started
+        with self._lock:
+            stats = self.lanes[lane]
+            stats.queued -= 1
+            stats.requests += 1
+            stats.total_wait += waited
+            stats.max_wait = max(stats.max_wait, waited)
+
+    def _release(self, lane: Lane) -> None:
+        with self._lock:
+            self.lanes[lane].in_flight -= 1
+
+    def acquire(self, lane: Lane, tokens: int) -> None:
+        """Block until there's a slot and budget for one request of this many tokens."""
+        started = self._start_waiting(lane)
+        try:
+            while (wait := self._try_acquire(lane, tokens)) > 0:
+                time.sleep(wait)
+        finally:
+            self._stop_waiting(lane, started)
+
+    async def acquire_async(self, lane: Lane, tokens: int) -> None:
+        """Wait (without blocking the event loop) for a slot and budget for one request."""
+        started = self._start_waiting(lane)
+        try:
+            while (wait := self._try_acquire(lane, tokens)) > 0:
+                await asyncio.sleep(wait)
+        finally:
+            self._stop_waiting(lane, started)
+
+    def call(self, fn: Callable[..., Any], *args, lane: Lane, tokens: int = 0, **kwargs) -> Any:
+        """Call fn within the lane's limits, retrying retryable errors."""
+        attempt = 0
+        while True:
+            self.acquire(lane, tokens)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+            finally:
+                self._release(lane)
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(self, fn: Callable[..., Awaitable[Any]], *args, lane: Lane, tokens: int = 0, **kwargs) -> Any:
+        """Await fn within the lane's limits, retrying retryable errors."""
+        attempt = 0
+        while True:
+            await self.acquire_async(lane, tokens)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+            finally:
+                self._release(lane)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _on_error(self, error: Exception, attempt: int) -> float:
+        """Get the delay before retrying, or re-raise if the error isn't retryable."""
+        status_code = getattr(error, "status_code", None)
+        is_retryable = (
+            status_code in RETRYABLE_STATUS_CODES
+            or isinstance(error, (openai.APIConnectionError, httpx.TransportError))
+        )
+        if not is_retryable or attempt >= self.max_retries:
+            raise error
+
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        hint = _retry_after(error)
+        # Honor the server's hint, with a little jitter so callers don't retry in lockstep
+        delay = hint * random.uniform(1.0, 1.2) if hint is not None else backoff
+
+        with self._lock:
+            self.retries += 1
+            if status_code == 429:
+                self.rate_limited += 1
+                # Everyone backs off, not just the caller that hit the limit
+                self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+        logger.warning("Embedding request failed (%s), retry %d/%d in %.2fs",
+            status_code or type(error).__name__, attempt + 1, self.max_retries, delay)
+        return delay
+
+    def stats(self) -> dict:
+        """Get retry counters, remaining budget and per-lane queue stats."""
+        with self._lock:
+            now = time.monotonic()
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket._refill(now)
+            return {
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "requests_available": self.requests.available if self.requests else None,
+                "tokens_available": self.tokens.available if self.tokens else None,
+                "max_concurrency": self.max_concurrency,
+                "reserved_search_slots": self.reserved_slots,
+                "lanes": {lane.value: stats.as_dict() for lane, stats in self.lanes.items()},
+            }
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the server's retry hint (retry-after-ms / retry-after) in seconds."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return None
@@ -1,37 +1,108 @@
 import time
-from openai import OpenAI
-from functools import lru_cache
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from openai import OpenAI, AsyncOpenAI
 from fastapi import HTTPException
 from modules.logger import logger
 from api.schemas.error import ErrorCode
-from modules.env import OPENAI_API_KEY, OLLAMA_URL
+from modules.env import (
+    OPENAI_API_KEY, OLLAMA_URL, EMBEDDING_CONCURRENCY,
+    EMBEDDING_RPM, EMBEDDING_TPM, EMBEDDING_MAX_RETRIES,
+    EMBEDDING_MAX_IN_FLIGHT, EMBEDDING_SEARCH_RESERVE
+)
 from modules.embedding_conf import EMBEDDING_MODEL, ACTIVE_CONFIG
+from modules.embedding_cache import embedding_cache, query_embedding_cache
+from modules.search_cache import normalize_query
+from modules.concurrency import run_blocking
+from modules.embedding_scheduler import EmbeddingScheduler, Lane
+from modules.tokenizer import count_tokens, count_tokens_batch
 import ollama
 
 # Initialize clients based on provider
 if ACTIVE_CONFIG["provider"] == "openai":
     if not OPENAI_API_KEY:
         raise ValueError("OpenAI API key required for OpenAI models")
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
+    # Retries are handled by the scheduler, not the SDK
+    openai_client = OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+    async_openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
 else:  # ollama
+    # One client for all batches so the HTTP connection pool is reused
     ollama_client = ollama.Client(host=OLLAMA_URL)
+    async_ollama_client = ollama.AsyncClient(host=OLLAMA_URL)
+
+# Every embedding call goes through this scheduler so we stay within the
+# model's rate limits and retry 429s/5xx instead of failing the job.
+# Search calls get priority and a reserved share over ingestion.
+scheduler = EmbeddingScheduler(
+    rpm=EMBEDDING_RPM or ACTIVE_CONFIG.get("rpm"),
+    tpm=EMBEDDING_TPM or ACTIVE_CONFIG.get("tpm"),
+    max_concurrency=EMBEDDING_MAX_IN_FLIGHT,
+    search_reserve=EMBEDDING_SEARCH_RESERVE,
+    max_retries=EMBEDDING_MAX_RETRIES,
+)
+
+# Pool for sending document embedding batches, shared by every job. Sized
+# like the scheduler so ingestion can use all of its slots across documents,
+# each document is held to EMBEDDING_CONCURRENCY batches at a time.
+embedding_executor = ThreadPoolExecutor(max_workers=EMBEDDING_MAX_IN_FLIGHT, thread_name_prefix="embedding")
+
+def _missing_queries(queries: list[str], embeddings: list[Optional[list[float]]]) -> dict[str, str]:
+    """Get the queries to embed by cache key, one per key (the first spelling seen)."""
+    missing = {}
+    for query, embedding in zip(queries, embeddings):
+        if embedding is None:
+            missing.setdefault(query_embedding_cache.key(query), query)
+    return missing
 
-# Cache common query embeddings (uses very little RAM, big speed win)
-@lru_cache(maxsize=1000)
 def get_query_embedding(text: str | list[str]) -> list[list[float]] | list[float]:
-    """Get embeddings from the active provider."""
-    start_time = time.time()
-    logger.debug("Getting query embedding for text: %s", text)
-    if ACTIVE_CONFIG["provider"] == "openai":
-        embeddings = _get_openai_embedding(text)
-    else:
-        embeddings = _get_ollama_embedding(text)
-    end_time = time.time()
-    logger.debug("Query embedding retrieved in %s seconds with model %s", end_time - start_time, EMBEDDING_MODEL)
+    """Get query embeddings from the active provider, through the shared query cache.
+
+    Queries are embedded with Unicode and whitespace normalized, and looked
+    up regardless of case, so "What is X?" and "what is  x?" share one cache
+    entry.
+    """
+    queries = [normalize_query(q) for q in ([text] if isinstance(text, str) else text)]
+    embeddings = query_embedding_cache.get_many(queries)
+
+    missing = _missing_queries(queries, embeddings)
+    if missing:
+        start_time = time.time()
+        logger.debug("Getting query embeddings for %d queries: %s", len(missing), list(missing.values()))
+        new_embeddings = _embed(list(missing.values()), lane=Lane.SEARCH)
+        logger.debug("Query embeddings retrieved in %s seconds with model %s", time.time() - start_time, EMBEDDING_MODEL)
+        query_embedding_cache.put_many(list(missing.values()), new_embeddings)
+
+        by_key = dict(zip(missing, new_embeddings))
+        embeddings = [e if e is not None else by_key[query_embedding_cache.key(q)] for q, e in zip(queries, embeddings)]
+
+    return embeddings[0] if isinstance(text, str) else embeddings
+
+async def get_query_embedding_async(text: str) -> list[float]:
+    """Get a query embedding without blocking the event loop, see get_query_embedding."""
+    return (await get_query_embeddings_async([text]))[0]
+
+async def get_query_embeddings_async(texts: list[str]) -> list[list[float]]:
+    """Get embeddings for several queries, with one provider request for all cache misses."""
+    queries = [normalize_query(t) for t in texts]
+    embeddings = await run_blocking(query_embedding_cache.get_many, queries)
+
+    missing = _missing_queries(queries, embeddings)
+    if missing:
+        start_time = time.time()
+        logger.debug("Getting query embeddings for %d queries: %s", len(missing), list(missing.values()))
+        new_embeddings = await _aembed(list(missing.values()), lane=Lane.SEARCH)
+        logger.debug("Query embeddings retrieved in %s seconds with model %s", time.time() - start_time, EMBEDDING_MODEL)
+        await run_blocking(query_embedding_cache.put_many, list(missing.values()), new_embeddings)
+
+        by_key = dict(zip(missing, new_embeddings))
+        embeddings = [e if e is not None else by_key[query_embedding_cache.key(q)] for q, e in zip(queries, embeddings)]
+
     return embeddings
 
 def get_document_chunk_embeddings(texts: list[str]) -> list[list[float]]:
-    """Get embeddings for multiple document chunks from OpenAI."""
+    """Get embeddings for multiple document chunks, reusing cached ones."""
     try:
         # Log chunk statistics
         logger.debug("Chunk statistics:")
@@ -55,21 +126,36 @@ def get_document_chunk_embeddings(texts: list[str]) -> list[list[float]]:
         if any(len(t.strip()) == 0 for t in texts):
             raise ValueError("Empty chunks detected")
             
-        # Add config-based validation
+        # Add config-based validation (exact token counts, reused to size requests)
         max_tokens = ACTIVE_CONFIG["max_tokens"]
-        if any(len(t) > max_tokens for t in texts):
-            raise ValueError(f"Chunk too large for model {EMBEDDING_MODEL}")
+        token_counts = count_tokens_batch(texts)
+        largest = max(token_counts)
+        if largest > max_tokens:
+            raise ValueError(f"Chunk too large for model {EMBEDDING_MODEL} ({largest} tokens, max {max_tokens})")
             
-        # Log API request details
-        logger.debug("Making OpenAI API request with model: %s", EMBEDDING_MODEL)
-        logger.debug("Request payload size: %d bytes", 
-            sum(len(t.encode('utf-8')) for t in texts)
+        # Only embed chunks we haven't embedded before (each unique text once)
+        embeddings = embedding_cache.get_many(texts)
+        missing_tokens = {}
+        for t, e, tokens in zip(texts, embeddings, token_counts):
+            if e is None:
+                missing_tokens.setdefault(t, tokens)
+        missing_texts = list(missing_tokens)
+        logger.info("Embedding cache: %d/%d chunks cached, %d to embed",
+            len(texts) - sum(1 for e in embeddings if e is None), len(texts), len(missing_texts)
         )
-        
-        if ACTIVE_CONFIG["provider"] == "openai":
-            embeddings = _get_openai_embedding(texts)
-        else:
-            embeddings = _get_ollama_embedding(texts)
+
+        if missing_texts:
+            # Log API request details
+            logger.debug("Making %s API request with model: %s", ACTIVE_CONFIG["provider"], EMBEDDING_MODEL)
+            logger.debug("Request payload size: %d bytes", 
+                sum(len(t.encode('utf-8')) for t in missing_texts)
+            )
+            
+            new_embeddings = _embed_in_batches(missing_texts, list(missing_tokens.values()))
+            embedding_cache.put_many(missing_texts, new_embeddings)
+
+            by_text = dict(zip(missing_texts, new_embeddings))
+            embeddings = [e if e is not None else by_text[t] for t, e in zip(texts, embeddings)]
         
         logger.debug("Successfully got embeddings")
         return embeddings
@@ -78,16 +164,87 @@ def get_document_chunk_embeddings(texts: list[str]) -> list[list[float]]:
         # Log more error details if available
         if hasattr(e, 'response'):
             logger.error("API Response details: %s", e.response)
+        is_rate_limited = getattr(e, 'status_code', None) == 429
         raise HTTPException(
-            status_code=500,
+            status_code=429 if is_rate_limited else 500,
             detail={
                 "error": {
-                    "code": ErrorCode.PROCESSING_ERROR,
+                    "code": ErrorCode.RATE_LIMITED if is_rate_limited else ErrorCode.PROCESSING_ERROR,
                     "message": f"Failed to get embeddings: {str(e)}"
                 }
             }
         )
     
+def _plan_batches(texts: list[str], token_counts: list[int]) -> list[tuple[list[int], int]]:
+    """Pack text indices into batches that fit the model's per-request limits.
+
+    Batches are capped by input count (batch_size) and total tokens
+    (max_batch_tokens), and small inputs are spread over EMBEDDING_CONCURRENCY
+    batches so they can be sent in parallel.
+
+    Args:
+        texts: Texts to embed
+        token_counts: Token count of each text
+
+    Returns:
+        list[tuple[list[int], int]]: (text indices, total tokens) per batch
+    """
+    spread_size = max(1, math.ceil(len(texts) / EMBEDDING_CONCURRENCY))
+    max_inputs = min(ACTIVE_CONFIG.get("batch_size", len(texts)), spread_size)
+    max_tokens = ACTIVE_CONFIG.get("max_batch_tokens")
+
+    batches = []
+    current = []
+    current_tokens = 0
+    for i, tokens in enumerate(token_counts):
+        is_full = len(current) >= max_inputs or (max_tokens and current_tokens + tokens > max_tokens)
+        if current and is_full:
+            batches.append((current, current_tokens))
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append((current, current_tokens))
+    return batches
+
+def _embed_in_batches(texts: list[str], token_counts: list[int]) -> list[list[float]]:
+    """Embed texts in concurrent, size-limited batches, keeping the input order.
+
+    At most EMBEDDING_CONCURRENCY batches of the call are in flight at once.
+    """
+    batches = _plan_batches(texts, token_counts)
+    logger.debug("Sending %d embedding batches (concurrency %d)", len(batches), EMBEDDING_CONCURRENCY)
+
+    embeddings = [None] * len(texts)
+    in_flight = deque()
+
+    def collect():
+        batch, future = in_flight.popleft()
+        for i, embedding in zip(batch, future.result()):
+            embeddings[i] = embedding
+
+    for batch, tokens in batches:
+        if len(in_flight) >= EMBEDDING_CONCURRENCY:
+            collect()
+        in_flight.append((batch, embedding_executor.submit(_embed, [texts[i] for i in batch], Lane.INGEST, tokens)))
+    while in_flight:
+        collect()
+    return embeddings
+
+def _embed(text: str | list[str], lane: Lane, tokens: int | None = None) -> list[list[float]] | list[float]:
+    """Embed with the active provider through the rate limit scheduler."""
+    if tokens is None:
+        tokens = count_tokens(text) if isinstance(text, str) else sum(count_tokens_batch(text))
+    provider_fn = _get_openai_embedding if ACTIVE_CONFIG["provider"] == "openai" else _get_ollama_embedding
+    return scheduler.call(provider_fn, text, lane=lane, tokens=tokens)
+
+async def _aembed(text: str | list[str], lane: Lane) -> list[list[float]] | list[float]:
+    """Async version of _embed."""
+    tokens = count_tokens(text) if isinstance(text, str) else sum(count_tokens_batch(text))
+    provider_fn = _aget_openai_embedding if ACTIVE_CONFIG["provider"] == "openai" else _aget_ollama_embedding
+    return await scheduler.call_async(provider_fn, text, lane=lane, tokens=tokens)
+
 def _get_openai_embedding(text: str | list[str]) -> list[list[float]] | list[float]:
     """Get embeddings from OpenAI."""
     response = openai_client.embeddings.create(
@@ -97,24 +254,26 @@ def _get_openai_embedding(text: str | list[str]) -> list[list[float]] | list[flo
     return response.data[0].embedding if isinstance(text, str) else [d.embedding for d in response.data]
 
 def _get_ollama_embedding(text: str | list[str]) -> list[list[float]] | list[float]:
-    """Get embeddings from Ollama."""
-    if isinstance(text, str):
-        texts = [text]
-    else:
-        texts = text
-
-    embeddings = []
-    for chunk in texts:
-        response = ollama_client.embeddings(model=EMBEDDING_MODEL, prompt=chunk)
-        embeddings.append(response['embedding'])
-    
+    """Get embeddings from Ollama using the batch embed API."""
+    response = ollama_client.embed(model=EMBEDDING_MODEL, input=text)
+    embeddings = response['embeddings']
+    return embeddings[0] if isinstance(text, str) else embeddings
+
+async def _aget_openai_embedding(text: str | list[str]) -> list[list[float]] | list[float]:
+    """Get embeddings from OpenAI with the async client."""
+    response = await async_openai_client.embeddings.create(
+        model=EMBEDDING_MODEL,
+        input=text
+    )
+    return response.data[0].embedding if isinstance(text, str) else [d.embedding for d in response.data]
+
+async def _aget_ollama_embedding(text: str | list[str]) -> list[list[float]] | list[float]:
+    """Get embeddings from Ollama with the async client."""
+    response = await async_ollama_client.embed(model=EMBEDDING_MODEL, input=text)
+    embeddings = response['embeddings']
     return embeddings[0] if isinstance(text, str) else embeddings
 
 def test_embedding_provider() -> list[float]:
     """Test the embedding provider."""
     text = "This is a test embedding."
-    if ACTIVE_CONFIG["provider"] == "openai":
-        embeddings = _get_openai_embedding(text)
-    else:
-        embeddings = _get_ollama_embedding(text)
-    return embeddings
\ No newline at end of file
+    return _embed(text, lane=Lane.SEARCH)
\ No newline at end of file
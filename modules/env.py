@@ -27,4 +27,69 @@ OPENAI_API_KEY = get_optional_env("OPENAI_API_KEY")
 OLLAMA_URL = get_optional_env("OLLAMA_URL", "http://localhost:11434")
 API_KEY = get_optional_env("API_KEY")
 STORAGE_URL = get_optional_env("STORAGE_URL")
-LOG_LEVEL = get_optional_env("LOG_LEVEL", "DEBUG")
\ No newline at end of file
+LOG_LEVEL = get_optional_env("LOG_LEVEL", "DEBUG")
+
+# Embedding cache (set EMBEDDING_CACHE_MAX_MB=0 to disable)
+EMBEDDING_CACHE_PATH = get_optional_env("EMBEDDING_CACHE_PATH", "data/embedding_cache.db")
+EMBEDDING_CACHE_MAX_MB = int(get_optional_env("EMBEDDING_CACHE_MAX_MB", "1024"))
+
+# Search query embedding cache, in the same file (QUERY_CACHE_MAX_MB=0 disables it,
+# QUERY_CACHE_TTL_DAYS=0 keeps entries until evicted)
+QUERY_CACHE_MAX_MB = int(get_optional_env("QUERY_CACHE_MAX_MB", "64"))
+QUERY_CACHE_TTL_DAYS = float(get_optional_env("QUERY_CACHE_TTL_DAYS", "30"))
+
+# Max embedding requests in flight for a single document (EMBEDDING_MAX_IN_FLIGHT caps the total)
+EMBEDDING_CONCURRENCY = int(get_optional_env("EMBEDDING_CONCURRENCY", "4"))
+
+# Threads for blocking vector store calls made from request handlers
+VECTOR_STORE_WORKERS = int(get_optional_env("VECTOR_STORE_WORKERS", "8"))
+
+# Embedding rate limits (default to the model's limits in MODEL_CONFIGS)
+EMBEDDING_RPM = int(get_optional_env("EMBEDDING_RPM", "0"))
+EMBEDDING_TPM = int(get_optional_env("EMBEDDING_TPM", "0"))
+EMBEDDING_MAX_RETRIES = int(get_optional_env("EMBEDDING_MAX_RETRIES", "6"))
+
+# Embedding requests in flight across all jobs and searches, and the share
+# of concurrency and rate budget reserved for search queries
+EMBEDDING_MAX_IN_FLIGHT = int(get_optional_env("EMBEDDING_MAX_IN_FLIGHT", "8"))
+EMBEDDING_SEARCH_RESERVE = float(get_optional_env("EMBEDDING_SEARCH_RESERVE", "0.2"))
+
+# Job queue: worker count, lease length, retries for crashed jobs, shutdown drain
+JOB_WORKERS = int(get_optional_env("JOB_WORKERS", "2"))
+JOB_LEASE_SECONDS = int(get_optional_env("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(get_optional_env("JOB_MAX_ATTEMPTS", "3"))
+JOB_DRAIN_TIMEOUT = int(get_optional_env("JOB_DRAIN_TIMEOUT", "30"))
+# Threads for the blocking stages of processing jobs, shared by all workers
+INGEST_THREADS = int(get_optional_env("INGEST_THREADS", "8"))
+
+# Files processed in parallel by a batch (prefix) job, default and upper bound
+BATCH_CONCURRENCY = int(get_optional_env("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(get_optional_env("BATCH_MAX_CONCURRENCY", "16"))
+
+# S3 watcher: queue new, changed and deleted files under WATCH_PREFIX of
+# WATCH_BUCKET (disabled when unset), listing this many pages per poll
+WATCH_BUCKET = get_optional_env("WATCH_BUCKET")
+WATCH_PREFIX = get_optional_env("WATCH_PREFIX", "")
+WATCH_INTERVAL_SECONDS = int(get_optional_env("WATCH_INTERVAL_SECONDS", "60"))
+WATCH_PAGES_PER_POLL = int(get_optional_env("WATCH_PAGES_PER_POLL", "10"))
+
+# Processes for CPU-bound pipeline stages (decode, hash, split), 0 = one per CPU
+PIPELINE_PROCESS_WORKERS = int(get_optional_env("PIPELINE_PROCESS_WORKERS", "0"))
+
+# In-memory search result cache (set SEARCH_CACHE_MAX_MB=0 to disable)
+SEARCH_CACHE_MAX_MB = int(get_optional_env("SEARCH_CACHE_MAX_MB", "64"))
+
+# Vector search hits scored by keyword reranking (rerank=true)
+RERANK_CANDIDATES = int(get_optional_env("RERANK_CANDIDATES", "100"))
+
+# Hits taken from each of the vector store and the lexical index for hybrid search
+HYBRID_CANDIDATES = int(get_optional_env("HYBRID_CANDIDATES", "50"))
+
+# Paginated search: results ranked on the first page, and how long and how many
+# ranked lists are kept for the next pages
+SEARCH_MAX_RESULTS = int(get_optional_env("SEARCH_MAX_RESULTS", "200"))
+SEARCH_CURSOR_TTL_SECONDS = float(get_optional_env("SEARCH_CURSOR_TTL_SECONDS", "300"))
+SEARCH_CURSOR_MAX_ENTRIES = int(get_optional_env("SEARCH_CURSOR_MAX_ENTRIES", "1000"))
+
+# Documents a source_prefix filter that isn't a directory may match before it's rejected
+SEARCH_PREFIX_MAX_KEYS = int(get_optional_env("SEARCH_PREFIX_MAX_KEYS", "500"))
@@ -0,0 +1,5 @@
+import hashlib
+
+def content_hash(text: str) -> str:
+    """Get a stable SHA-256 hex digest of text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
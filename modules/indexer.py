@@ -0,0 +1,209 @@
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
+from modules.logger import logger
+from modules.hashing import content_hash
+from modules.collection_version import collection_version
+from modules.keywords import encode_terms
+from modules.lexical_index import lexical_index
+
+# Keep Chroma writes under its max batch size
+_WRITE_BATCH_SIZE = 1000
+
+# Prefix of chunk metadata fields holding the S3 object's user metadata
+TAG_PREFIX = "tag_"
+
+# Prefix of chunk metadata fields holding the directories of the source key
+# (dir_1 = "a/", dir_2 = "a/b/" for "a/b/c.md"), dir_depth is how many there are
+DIR_PREFIX = "dir_"
+
+def source_dir_metadata(source: str) -> dict:
+    """Get chunk metadata fields for the directories of a source key, for directory prefix filters."""
+    dirs = source.split("/")[:-1]
+    fields = {"dir_depth": len(dirs)}
+    for depth in range(1, len(dirs) + 1):
+        fields[f"{DIR_PREFIX}{depth}"] = "/".join(dirs[:depth]) + "/"
+    return fields
+
+def tag_metadata(tags: Optional[dict]) -> dict:
+    """Get chunk metadata fields for an S3 object's user metadata (tag_<name>: value)."""
+    return {f"{TAG_PREFIX}{name.lower()}": str(value) for name, value in (tags or {}).items()}
+
+def embedded_at_timestamp(embedded_at: datetime) -> float:
+    """Get the numeric embedded_at stored on chunks for range filters (naive means UTC)."""
+    if embedded_at.tzinfo is None:
+        embedded_at = embedded_at.replace(tzinfo=timezone.utc)
+    return embedded_at.timestamp()
+
+def missing_chunk_fields(metadata: dict, chunk: str) -> dict:
+    """Get fields that chunks written by older versions lack, derived from their text and metadata."""
+    missing = {}
+    if "terms" not in metadata:
+        missing["terms"] = encode_terms(chunk)
+    if "dir_depth" not in metadata and "source" in metadata:
+        missing.update(source_dir_metadata(metadata["source"]))
+    if "embedded_at_ts" not in metadata and metadata.get("embedded_at"):
+        missing["embedded_at_ts"] = embedded_at_timestamp(datetime.fromisoformat(metadata["embedded_at"]))
+    return missing
+
+def iter_chunk_ids(key: str, chunks: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """Pair each chunk with its content-based id, see get_chunk_ids."""
+    seen = {}
+    for chunk in chunks:
+        chunk_hash = content_hash(chunk)[:16]
+        occurrence = seen.get(chunk_hash, 0)
+        seen[chunk_hash] = occurrence + 1
+        yield (f"{key}_{chunk_hash}" if occurrence == 0 else f"{key}_{chunk_hash}_{occurrence}"), chunk
+
+def get_chunk_ids(key: str, chunks: list[str]) -> list[str]:
+    """Get content-based ids for a document's chunks.
+
+    An id only depends on the document key and the chunk text, so a chunk
+    keeps its id when other parts of the document change. Repeated chunks
+    get an occurrence suffix to stay unique.
+    """
+    return [chunk_id for chunk_id, _ in iter_chunk_ids(key, chunks)]
+
+def sync_document_chunks(
+    collection,
+    key: str,
+    chunks: Iterable[str],
+    embed: Callable[[list[str]], list[list[float]]],
+    embedded_at: datetime,
+    batch_size: int = _WRITE_BATCH_SIZE,
+    tags: Optional[dict] = None
+) -> dict:
+    """Bring a document's chunks in the collection in line with chunks.
+
+    Only new chunks are embedded and added, only chunks that are gone are
+    deleted, and unchanged chunks that moved, whose document's tags changed
+    or that lack fields added since they were written get their metadata
+    updated.
+    New chunks are added before old ones are deleted, so searches never
+    see the document missing.
+
+    New chunks store their terms (see modules/keywords.py) in the metadata,
+    so reranking doesn't have to tokenize them at search time, and
+    embedded_at as a timestamp (embedded_at_ts) for range filters. The BM25
+    lexical index (modules/lexical_index.py) is updated along with the
+    collection.
+
+    Every write bumps the collection version, so cached search results
+    from before it are never served again.
+
+    Chunks are read, embedded and written batch_size at a time, so chunks
+    can be a generator over a document too big to hold in memory. Only the
+    chunk ids are kept until the end, to find the ones to delete.
+
+    Args:
+        collection: ChromaDB collection
+        key: Document key (stored as the chunks' source)
+        chunks: Current chunks of the document, in order
+        embed: Function that embeds a list of texts
+        embedded_at: Timestamp recorded on newly embedded chunks
+        batch_size: Chunks embedded and written at a time
+        tags: The S3 object's user metadata, stored as tag_<name> fields
+
+    Returns:
+        dict: Counts of added, removed, moved and unchanged chunks
+    """
+    current_ids = set()
+    added = moved = total = 0
+    tag_fields = tag_metadata(tags)
+    dir_fields = source_dir_metadata(key)
+
+    chunk_ids = iter_chunk_ids(key, chunks)
+    while batch := list(islice(chunk_ids, batch_size)):
+        positions = range(total, total + len(batch))
+        total += len(batch)
+        batch_ids = [chunk_id for chunk_id, _ in batch]
+        current_ids.update(batch_ids)
+
+        existing = collection.get(ids=batch_ids, where={"source": key}, include=['metadatas'])
+        existing_metadata = dict(zip(existing['ids'], existing['metadatas']))
+
+        new = [(i, chunk_id, chunk) for i, (chunk_id, chunk) in zip(positions, batch) if chunk_id not in existing_metadata]
+        if new:
+            embeddings = embed([chunk for _, _, chunk in new])
+            collection.add(
+                documents=[chunk for _, _, chunk in new],
+                embeddings=embeddings,
+                ids=[chunk_id for _, chunk_id, _ in new],
+                metadatas=[
+                    {
+                        "source": key,
+                        "chunk": i,
+                        "embedded_at": embedded_at.isoformat(),
+                        "embedded_at_ts": embedded_at_timestamp(embedded_at),
+                        "terms": encode_terms(chunk),
+                        **dir_fields,
+                        **tag_fields
+                    }
+                    for i, _, chunk in new
+                ]
+            )
+        # Also indexes unchanged chunks written before the lexical index existed
+        if lexical_index.add(key, batch) or new:
+            collection_version.bump()
+
+        relocated = []
+        updates = []
+        for i, (chunk_id, chunk) in zip(positions, batch):
+            metadata = existing_metadata.get(chunk_id)
+            if metadata is None:
+                continue
+            if metadata.get('chunk') != i:
+                relocated.append(chunk_id)
+            old_tags = {name: value for name, value in metadata.items() if name.startswith(TAG_PREFIX)}
+            missing = missing_chunk_fields(metadata, chunk)
+            if metadata.get('chunk') != i or old_tags != tag_fields or missing:
+                # Chroma merges updated metadata, None removes tags the object doesn't have anymore
+                removed_tags = {name: None for name in old_tags if name not in tag_fields}
+                updates.append((chunk_id, {**metadata, **removed_tags, **tag_fields, **missing, "chunk": i}))
+        if updates:
+            collection.update(
+                ids=[chunk_id for chunk_id, _ in updates],
+                metadatas=[metadata for _, metadata in updates]
+            )
+            collection_version.bump()
+
+        added += len(new)
+        moved += len(relocated)
+
+    existing_ids = collection.get(where={"source": key}, include=[])['ids']
+    removed_ids = [chunk_id for chunk_id in existing_ids if chunk_id not in current_ids]
+    for start in range(0, len(removed_ids), _WRITE_BATCH_SIZE):
+        collection.delete(ids=removed_ids[start:start + _WRITE_BATCH_SIZE])
+    if removed_ids:
+        lexical_index.remove(removed_ids)
+        collection_version.bump()
+
+    result = {
+        "added": added,
+        "removed": len(removed_ids),
+        "moved": moved,
+        "unchanged": total - added,
+    }
+    logger.info("Synced chunks for %s: %d added, %d removed, %d moved, %d unchanged",
+        key, result["added"], result["removed"], result["moved"], result["unchanged"])
+    return result
+
+def remove_document_chunks(collection, key: str) -> int:
+    """Delete every chunk of a document from the collection.
+
+    Args:
+        collection: ChromaDB collection
+        key: Document key (the chunks' source)
+
+    Returns:
+        int: Number of chunks deleted
+    """
+    ids = collection.get(where={"source": key}, include=[])['ids']
+    for start in range(0, len(ids), _WRITE_BATCH_SIZE):
+        collection.delete(ids=ids[start:start + _WRITE_BATCH_SIZE])
+    # Also catches chunks the lexical index kept after a failed sync
+    lexical_index.remove_source(key)
+    if ids:
+        collection_version.bump()
+    logger.info("Removed %d chunks for %s", len(ids), key)
+    return len(ids)
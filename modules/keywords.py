@@ -0,0 +1,39 @@
+import numpy as np
+
+def get_terms(text: str) -> set[str]:
+    """Get the set of lowercased, whitespace separated words in text."""
+    return set(text.lower().split())
+
+def encode_terms(text: str) -> str:
+    """Get a chunk's terms as stored in its metadata (unique words, space separated)."""
+    return " ".join(sorted(get_terms(text)))
+
+def keyword_scores(query: str, documents: list[str], terms: list[str | None]) -> np.ndarray:
+    """Score candidates by the share of query words they contain.
+
+    Args:
+        query: Search query
+        documents: Candidate texts, only tokenized when terms are missing
+        terms: Each candidate's stored terms (see encode_terms), or None
+            for chunks indexed before terms were stored
+
+    Returns:
+        np.ndarray: Score between 0 and 1 per candidate
+    """
+    # Terms never contain whitespace, so a space-delimited term is found in
+    # the space-delimited stored string exactly when the candidate has it,
+    # without splitting the stored terms again
+    query_terms = [f" {term} " for term in get_terms(query)]
+    if not query_terms or not documents:
+        return np.zeros(len(documents))
+
+    stored = (
+        f" {stored if stored is not None else encode_terms(document)} "
+        for document, stored in zip(documents, terms)
+    )
+    overlap = np.fromiter(
+        (sum(term in candidate for term in query_terms) for candidate in stored),
+        dtype=float,
+        count=len(documents)
+    )
+    return overlap / len(query_terms)
@@ -0,0 +1,268 @@
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+from modules.logger import logger
+from modules.sqlite_batches import lookup_batches, placeholders
+
+# Words and numbers, so identifiers like "ERR-1042" or "user_id" are matched by their parts
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercased word tokens for the lexical index."""
+    return _TOKEN.findall(text.lower())
+
+class LexicalIndex:
+    """BM25 inverted index over the collection's chunks, stored in SQLite.
+
+    Every term has a postings list of (chunk id, term frequency, chunk
+    length) rows, and its document frequency is kept in a separate table,
+    so a search only reads the postings of the query's terms and scores
+    them in SQL. Chunks are added and removed as documents are synced, the
+    index is never rebuilt as a whole.
+
+    Terms with more than max_term_postings postings (words like "the" in a
+    large collection) don't add candidates, they only add to the score of
+    chunks found through the query's rarer terms, so a search never reads
+    a postings list that covers most of the collection.
+
+    Writes go through one connection under a lock, searches use one
+    connection per thread and run alongside each other and the writer (WAL).
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75, max_term_postings: int = 10000):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.max_term_postings = max_term_postings
+        self._lock = threading.Lock()
+        self._readers = threading.local()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_chunks_source ON chunks (source);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                PRIMARY KEY (term, chunk_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS ix_postings_chunk_id ON postings (chunk_id);
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS index_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                chunk_count INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO index_stats (id, chunk_count, total_length) VALUES (1, 0, 0);
+        """)
+        self._conn.commit()
+
+    def add(self, source: str, chunks: Iterable[tuple[str, str]]) -> int:
+        """Index chunks of a document, skipping ids that are already indexed.
+
+        Args:
+            source: Document key the chunks belong to
+            chunks: (chunk id, text) pairs
+
+        Returns:
+            int: Number of chunks added
+        """
+        chunks = list(chunks)
+        with self._lock:
+            indexed = self._existing_ids([chunk_id for chunk_id, _ in chunks])
+            new = [(chunk_id, text) for chunk_id, text in chunks if chunk_id not in indexed]
+            if not new:
+                return 0
+
+            total_length = 0
+            for chunk_id, text in new:
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                total_length += length
+                self._conn.execute(
+                    "INSERT INTO chunks (chunk_id, source, length) VALUES (?, ?, ?)",
+                    (chunk_id, source, length)
+                )
+                self._conn.executemany(
+                    "INSERT INTO postings (term, chunk_id, tf, length) VALUES (?, ?, ?, ?)",
+                    [(term, chunk_id, tf, length) for term, tf in counts.items()]
+                )
+                self._conn.executemany(
+                    "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT (term) DO UPDATE SET df = df + 1",
+                    [(term,) for term in counts]
+                )
+            self._conn.execute(
+                "UPDATE index_stats SET chunk_count = chunk_count + ?, total_length = total_length + ? WHERE id = 1",
+                (len(new), total_length)
+            )
+            self._conn.commit()
+
+        logger.debug("Lexical index: added %d chunks for %s", len(new), source)
+        return len(new)
+
+    def remove(self, chunk_ids: list[str]) -> int:
+        """Remove chunks from the index. Returns the number of chunks removed."""
+        removed = 0
+        total_length = 0
+        with self._lock:
+            for batch in lookup_batches(chunk_ids):
+                rows = self._conn.execute(
+                    f"SELECT chunk_id, length FROM chunks WHERE chunk_id IN ({placeholders(batch)})", batch
+                ).fetchall()
+                if not rows:
+                    continue
+                ids = [chunk_id for chunk_id, _ in rows]
+                terms = self._conn.execute(
+                    f"SELECT term, COUNT(*) FROM postings WHERE chunk_id IN ({placeholders(ids)}) GROUP BY term", ids
+                ).fetchall()
+                self._conn.executemany("UPDATE terms SET df = df - ? WHERE term = ?", [(n, term) for term, n in terms])
+                self._conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({placeholders(ids)})", ids)
+                self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders(ids)})", ids)
+                removed += len(rows)
+                total_length += sum(length for _, length in rows)
+
+            if removed:
+                self._conn.execute("DELETE FROM terms WHERE df <= 0")
+                self._conn.execute(
+                    "UPDATE index_stats SET chunk_count = chunk_count - ?, total_length = total_length - ? WHERE id = 1",
+                    (removed, total_length)
+                )
+            self._conn.commit()
+        return removed
+
+    def remove_source(self, source: str) -> int:
+        """Remove every chunk of a document. Returns the number of chunks removed."""
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute("SELECT chunk_id FROM chunks WHERE source = ?", (source,))]
+        return self.remove(ids)
+
+    def search(self, query: str, limit: int) -> list[tuple[str, float]]:
+        """Get the best matching chunks for a query by BM25 score.
+
+        Returns:
+            list[tuple[str, float]]: (chunk id, score) pairs, best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        conn = self._reader()
+        chunk_count, total_length = conn.execute(
+            "SELECT chunk_count, total_length FROM index_stats WHERE id = 1"
+        ).fetchone()
+        if not chunk_count:
+            return []
+        frequencies = conn.execute(
+            f"SELECT term, df FROM terms WHERE term IN ({placeholders(terms)})", terms
+        ).fetchall()
+        if not frequencies:
+            return []
+
+        # Candidates come from the rare terms, common ones are only looked up
+        # for those candidates. If every term is common, the rarest one is
+        # used, reading at most max_term_postings of its postings.
+        frequencies.sort(key=lambda f: f[1])
+        rare = [(term, df) for term, df in frequencies if df <= self.max_term_postings]
+        capped = not rare
+        rare = rare or frequencies[:1]
+        common = frequencies[len(rare):]
+
+        bm25 = "q.idf * p.tf * (? + 1) / (p.tf + ? * (1 - ? + ? * p.length / ?))"
+        bm25_params = [self.k1, self.k1, self.b, self.b, total_length / chunk_count]
+        rare_params = self._idf_params(rare, chunk_count)
+        if capped:
+            postings = "(SELECT * FROM postings WHERE term = ? LIMIT ?)"
+            postings_params = [rare[0][0], self.max_term_postings]
+        else:
+            postings, postings_params = "postings", []
+        sql = f"""
+            WITH rare_terms (term, idf) AS (VALUES {",".join("(?, ?)" for _ in rare)})
+            SELECT p.chunk_id, SUM({bm25}) AS score
+            FROM rare_terms q
+            JOIN {postings} p ON p.term = q.term
+            GROUP BY p.chunk_id
+        """
+        params = [*rare_params, *bm25_params, *postings_params]
+        if common:
+            sql = f"""
+                WITH candidates AS ({sql}),
+                     common_terms (term, idf) AS (VALUES {",".join("(?, ?)" for _ in common)})
+                SELECT c.chunk_id,
+                       c.score + COALESCE((
+                           SELECT SUM({bm25})
+                           FROM common_terms q
+                           JOIN postings p ON p.term = q.term AND p.chunk_id = c.chunk_id
+                       ), 0) AS score
+                FROM candidates c
+            """
+            params = [*params, *self._idf_params(common, chunk_count), *bm25_params]
+        rows = conn.execute(f"{sql} ORDER BY score DESC LIMIT ?", [*params, limit]).fetchall()
+        return [(chunk_id, score) for chunk_id, score in rows]
+
+    def clear(self) -> None:
+        """Remove every chunk from the index."""
+        with self._lock:
+            self._conn.executescript("""
+                DELETE FROM postings;
+                DELETE FROM chunks;
+                DELETE FROM terms;
+                UPDATE index_stats SET chunk_count = 0, total_length = 0 WHERE id = 1;
+            """)
+        logger.info("Lexical index cleared")
+
+    def stats(self) -> dict:
+        """Get the number of indexed chunks and distinct terms."""
+        conn = self._reader()
+        chunk_count, total_length = conn.execute(
+            "SELECT chunk_count, total_length FROM index_stats WHERE id = 1"
+        ).fetchone()
+        term_count = conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+        return {
+            "chunks": chunk_count,
+            "terms": term_count,
+            "avg_chunk_length": total_length / chunk_count if chunk_count else 0.0,
+        }
+
+    @staticmethod
+    def _idf_params(frequencies: list[tuple[str, int]], chunk_count: int) -> list:
+        """Get (term, idf) values for a VALUES list, flattened into query parameters."""
+        params = []
+        for term, df in frequencies:
+            params += [term, math.log(1 + (chunk_count - df + 0.5) / (df + 0.5))]
+        return params
+
+    def _reader(self) -> sqlite3.Connection:
+        """Get the calling thread's read connection, opening it on first use."""
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._readers.conn = conn
+        return conn
+
+    def _existing_ids(self, chunk_ids: list[str]) -> set[str]:
+        """Get which of chunk_ids are indexed. Caller holds the lock."""
+        found = set()
+        for batch in lookup_batches(chunk_ids):
+            rows = self._conn.execute(
+                f"SELECT chunk_id FROM chunks WHERE chunk_id IN ({placeholders(batch)})", batch
+            )
+            found.update(row[0] for row in rows)
+        return found
+
+# Lives next to the Chroma data, like the collection version
+lexical_index = LexicalIndex("./chroma_db/lexical_index.db")
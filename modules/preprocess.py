@@ -0,0 +1,27 @@
+import hashlib
+from modules.splitter import split_text
+
+def prepare_document(data: bytes) -> tuple[list[str], str]:
+    """Decode, hash, split and validate a document in one go.
+
+    CPU-bound, meant to run in the pipeline process pool: it takes the raw
+    bytes and only sends the chunks and the hash back, not the decoded text.
+
+    Args:
+        data: Raw file content (UTF-8)
+
+    Returns:
+        tuple[list[str], str]: Chunks and content hash (same as content_hash() of the text)
+
+    Raises:
+        UnicodeDecodeError: If the file isn't valid UTF-8
+        ValueError: If splitting produced empty chunks
+    """
+    text = data.decode('utf-8')
+    file_hash = hashlib.sha256(data).hexdigest()
+    chunks = split_text(text)
+
+    empty_chunks = [i for i, chunk in enumerate(chunks) if not chunk.strip()]
+    if empty_chunks:
+        raise ValueError(f"Document contains {len(empty_chunks)} empty chunks (first at indices {empty_chunks[:10]})")
+    return chunks, file_hash
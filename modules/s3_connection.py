@@ -1,4 +1,5 @@
 import boto3
+from datetime import datetime, timezone
 from typing import Optional, Any
 from botocore.client import BaseClient
 from .logger import logger
@@ -74,6 +75,46 @@ def get_file_content(bucket: str, key: str, s3: Any) -> str:
     Returns:
         str: File content as string
         
+    Raises:
+        Exception: If file cannot be retrieved
+    """
+    content, _ = get_file(bucket, key, s3)
+    return content
+
+def get_file_bytes(bucket: str, key: str, s3: Any) -> tuple[bytes, dict]:
+    """Get raw file content and object metadata from S3 bucket, without decoding.
+    
+    Args:
+        bucket: Bucket name
+        key: File key/path in bucket (URL encoded)
+        s3: S3 client
+        
+    Returns:
+        tuple[bytes, dict]: File content and metadata (etag, last_modified, size, tags)
+        
+    Raises:
+        botocore.exceptions.ClientError: If file cannot be retrieved
+    """
+    decoded_key = urllib.parse.unquote_plus(key)
+    logger.debug("Getting file bytes - bucket: %s, key: %s", bucket, decoded_key)
+    try:
+        response = s3.get_object(Bucket=bucket, Key=decoded_key)
+        return response['Body'].read(), _object_info(response)
+    except botocore.exceptions.ClientError as e:
+        logger.error("Failed to get file %s from bucket %s: %s", decoded_key, bucket, str(e))
+        raise
+
+def get_file(bucket: str, key: str, s3: Any) -> tuple[str, dict]:
+    """Get file content and object metadata from S3 bucket.
+    
+    Args:
+        bucket: Bucket name
+        key: File key/path in bucket (URL encoded)
+        s3: S3 client
+        
+    Returns:
+        tuple[str, dict]: File content and metadata (etag, last_modified, size, tags)
+        
     Raises:
         Exception: If file cannot be retrieved
     """
@@ -82,8 +123,123 @@ def get_file_content(bucket: str, key: str, s3: Any) -> str:
     logger.debug("Getting file content - bucket: %s, key: %s", bucket, decoded_key)
     try:
         response = s3.get_object(Bucket=bucket, Key=decoded_key)
-        return response['Body'].read().decode('utf-8')
+        content = response['Body'].read().decode('utf-8')
+        return content, _object_info(response)
     except botocore.exceptions.ClientError as e:
         error_msg = f"Failed to get file {decoded_key} from bucket {bucket}: {str(e)}"
         logger.error(error_msg)
-        raise  # Re-raise the original ClientError
\ No newline at end of file
+        raise  # Re-raise the original ClientError
+
+def open_file(bucket: str, key: str, s3: Any) -> tuple[Any, dict]:
+    """Open an S3 object for streaming, without reading its body.
+    
+    Args:
+        bucket: Bucket name
+        key: File key/path in bucket (URL encoded)
+        s3: S3 client
+        
+    Returns:
+        tuple[Any, dict]: The object's StreamingBody (close it when done) and
+        metadata (etag, last_modified, size, tags)
+        
+    Raises:
+        botocore.exceptions.ClientError: If object cannot be found or accessed
+    """
+    decoded_key = urllib.parse.unquote_plus(key)
+    logger.debug("Opening file stream - bucket: %s, key: %s", bucket, decoded_key)
+    try:
+        response = s3.get_object(Bucket=bucket, Key=decoded_key)
+        return response['Body'], _object_info(response)
+    except botocore.exceptions.ClientError as e:
+        logger.error("Failed to open file %s from bucket %s: %s", decoded_key, bucket, str(e))
+        raise
+
+def get_file_metadata(bucket: str, key: str, s3: Any) -> dict:
+    """Get object metadata from S3 with a HEAD request (no body download).
+    
+    Args:
+        bucket: Bucket name
+        key: File key/path in bucket (URL encoded)
+        s3: S3 client
+        
+    Returns:
+        dict: etag, last_modified (naive UTC) and size in bytes
+        
+    Raises:
+        botocore.exceptions.ClientError: If object cannot be found or accessed
+    """
+    decoded_key = urllib.parse.unquote_plus(key)
+    logger.debug("Getting file metadata - bucket: %s, key: %s", bucket, decoded_key)
+    try:
+        response = s3.head_object(Bucket=bucket, Key=decoded_key)
+        return _object_info(response)
+    except botocore.exceptions.ClientError as e:
+        logger.error("Failed to get metadata for %s from bucket %s: %s", decoded_key, bucket, str(e))
+        raise
+
+def list_objects_page(
+    bucket: str,
+    prefix: str,
+    s3: Any,
+    continuation_token: Optional[str] = None,
+    start_after: Optional[str] = None
+) -> tuple[list[dict], Optional[str]]:
+    """List one page (up to 1000 objects) of a bucket with ListObjectsV2.
+    
+    Args:
+        bucket: Bucket name
+        prefix: Only list keys starting with this prefix
+        s3: S3 client
+        continuation_token: Token returned by the previous page
+        start_after: Only list keys after this one (ignored with a token)
+        
+    Returns:
+        tuple[list[dict], Optional[str]]: Objects (key plus etag, last_modified
+        and size) and the token for the next page, None on the last page
+    """
+    params = {"Bucket": bucket, "Prefix": prefix}
+    if continuation_token:
+        params["ContinuationToken"] = continuation_token
+    elif start_after:
+        params["StartAfter"] = start_after
+    try:
+        response = s3.list_objects_v2(**params)
+    except botocore.exceptions.ClientError as e:
+        logger.error("Failed to list bucket %s (prefix '%s'): %s", bucket, prefix, str(e))
+        raise
+
+    objects = [
+        {"key": item['Key'], **_object_info({**item, "ContentLength": item.get('Size')})}
+        for item in response.get('Contents', [])
+    ]
+    next_token = response.get('NextContinuationToken') if response.get('IsTruncated') else None
+    return objects, next_token
+
+def encode_key(raw_key: str) -> str:
+    """Encode a raw S3 key (e.g. from a listing) the way the API expects keys.
+    
+    Keys given to the API are URL decoded before use, so keys that would
+    change when decoded are quoted. Plain keys are returned as they are.
+    """
+    if urllib.parse.unquote_plus(raw_key) == raw_key:
+        return raw_key
+    return urllib.parse.quote_plus(raw_key, safe="/")
+
+def _object_info(response: dict) -> dict:
+    """Pick change-detection fields and user metadata (tags) out of a GetObject/HeadObject response or listing entry.
+
+    Listings don't carry user metadata, their tags are always empty.
+    """
+    last_modified: Optional[datetime] = response.get('LastModified')
+    if last_modified is not None:
+        if last_modified.tzinfo is not None:
+            # Stored as naive UTC in SQLite
+            last_modified = last_modified.astimezone(timezone.utc).replace(tzinfo=None)
+        # Listings carry milliseconds, HEAD/GET only seconds
+        last_modified = last_modified.replace(microsecond=0)
+    return {
+        "etag": response.get('ETag'),
+        "last_modified": last_modified,
+        "size": response.get('ContentLength'),
+        "tags": response.get('Metadata') or {},
+    }
\ No newline at end of file
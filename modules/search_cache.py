@@ -0,0 +1,97 @@
+import json
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional
+from modules.env import SEARCH_CACHE_MAX_MB
+
+# Rough per-entry overhead (key, list, dicts) on top of the result text
+_ENTRY_OVERHEAD_BYTES = 512
+
+def normalize_query(query: str) -> str:
+    """Normalize a query's Unicode (NFKC) and whitespace, keeping its case.
+
+    This is the text that gets embedded, caches look queries up by query_key.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).split())
+
+def query_key(query: str) -> str:
+    """Get the text both query caches are keyed by: normalized and lowercased.
+
+    Lowercased like the keyword and BM25 tokenizers, so spellings that share
+    a key also share their embedding, keyword scores and results.
+    """
+    return normalize_query(query).lower()
+
+class SearchCache:
+    """In-memory LRU cache of search results, bounded by approximate size.
+
+    Keys include the collection version, so results cached before a write
+    to the collection can never be served after it. Old-version entries
+    just age out of the LRU.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(query: str, version: str, **params) -> tuple:
+        """Build a cache key from the query, the collection version and any search options."""
+        return (query_key(query), version, json.dumps(params, sort_keys=True, default=str))
+
+    def get(self, key: tuple) -> Optional[Any]:
+        """Get cached results, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, results: list, size: int) -> None:
+        """Cache results, size being roughly how many bytes they take."""
+        if not self.enabled:
+            return
+        size += _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (results, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+search_cache = SearchCache(max_bytes=SEARCH_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,61 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from modules.env import SEARCH_CURSOR_TTL_SECONDS, SEARCH_CURSOR_MAX_ENTRIES
+
+@dataclass
+class SearchCursor:
+    """Ranked results of one search, kept to serve its next pages."""
+    hits: list[tuple[str, float]]  # (chunk id, similarity), best first
+    page_size: int
+    expires_at: float
+
+class SearchCursors:
+    """Short-lived, in-memory store of ranked search results, for pagination.
+
+    A search that asks for pagination ranks a long candidate list once and
+    keeps only the chunk ids and scores here. Later pages are read from the
+    list, no embedding or vector query needed. Entries expire ttl_seconds
+    after they were last read, and the oldest ones are dropped past
+    max_entries. Cursors live in the worker process that created them.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, SearchCursor] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, hits: list[tuple[str, float]], page_size: int) -> str:
+        """Store a ranked list and return its cursor id."""
+        cursor_id = uuid.uuid4().hex
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            self._entries[cursor_id] = SearchCursor(hits=hits, page_size=page_size, expires_at=now + self.ttl_seconds)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cursor_id
+
+    def get(self, cursor_id: str) -> Optional[SearchCursor]:
+        """Get a stored ranked list and extend its lifetime, or None if it expired."""
+        now = time.monotonic()
+        with self._lock:
+            cursor = self._entries.get(cursor_id)
+            if cursor is None or cursor.expires_at < now:
+                self._entries.pop(cursor_id, None)
+                return None
+            cursor.expires_at = now + self.ttl_seconds
+            self._entries.move_to_end(cursor_id)
+            return cursor
+
+    def _evict(self, now: float) -> None:
+        """Drop expired cursors. Caller holds the lock."""
+        # Entries are ordered by last use, so expired ones are at the front
+        while self._entries and next(iter(self._entries.values())).expires_at < now:
+            self._entries.popitem(last=False)
+
+search_cursors = SearchCursors(ttl_seconds=SEARCH_CURSOR_TTL_SECONDS, max_entries=SEARCH_CURSOR_MAX_ENTRIES)
@@ -1,7 +1,19 @@
-from typing import List
+import codecs
+import re
+from typing import Iterable, Iterator, List
 from modules.embedding_conf import ACTIVE_CONFIG
+from modules.tokenizer import count_tokens
 
-def split_text(text: str, max_chunk_size: int = None) -> List[str]:
+# Start of every sentence boundary, as a lookahead so overlapping ones are found too
+_SENTENCE_BOUNDARY = re.compile(r'(?=([.!?][ \n]|\.\.\.))')
+
+# Packed pieces are separated like paragraphs
+_PACK_SEPARATOR = "\n\n"
+
+# Bump when a change to the splitting rules changes the chunks of existing files
+_SPLITTER_VERSION = 1
+
+def split_text(text: str, max_chunk_size: int = None, max_chunk_tokens: int = None) -> List[str]:
     """Split text using hierarchical chunking strategy.
     
     Main entry point for text splitting. Uses a hierarchical approach:
@@ -9,10 +21,132 @@ def split_text(text: str, max_chunk_size: int = None) -> List[str]:
     2. Split by paragraphs if needed
     3. Split by sentences if needed
     4. Split by words as last resort
+    5. Pack neighboring pieces into chunks up to the token budget
     """
     # Use config chunk size if none provided
     chunk_size = max_chunk_size or ACTIVE_CONFIG["chunk_size"]
-    return split_by_headings(text, chunk_size)
+    return list(pack_chunks(split_by_headings(text, chunk_size), _token_budget(max_chunk_tokens)))
+
+def pack_chunks(pieces: Iterable[str], max_tokens: int) -> Iterator[str]:
+    """Merge neighboring pieces into chunks of up to max_tokens tokens.
+    
+    Small paragraphs and sections would otherwise each become a chunk of
+    their own. Pieces are joined with a blank line and never split, so a
+    piece over the budget is a chunk by itself.
+    
+    Args:
+        pieces: Text pieces in document order
+        max_tokens: Token budget per chunk
+        
+    Yields:
+        str: Packed chunks in document order
+    """
+    separator_tokens = count_tokens(_PACK_SEPARATOR)
+    current = []
+    current_tokens = 0
+    
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if current and current_tokens + separator_tokens + tokens > max_tokens:
+            yield _PACK_SEPARATOR.join(current)
+            current = []
+            current_tokens = 0
+        if current:
+            current_tokens += separator_tokens
+        current.append(piece)
+        current_tokens += tokens
+    
+    if current:
+        yield _PACK_SEPARATOR.join(current)
+
+def _token_budget(max_chunk_tokens: int = None) -> int:
+    """Get the packing budget, never above what the model accepts."""
+    return min(max_chunk_tokens or ACTIVE_CONFIG["chunk_tokens"], ACTIVE_CONFIG["max_tokens"])
+
+def iter_lines(blocks: Iterable[bytes]) -> Iterator[str]:
+    """Decode UTF-8 blocks (e.g. from an S3 StreamingBody) into lines.
+    
+    Yields the same lines as text.splitlines() on the whole decoded text,
+    while only holding one block and one line in memory.
+    
+    Args:
+        blocks: Raw bytes, split anywhere (even inside a character)
+        
+    Yields:
+        str: Lines without their line endings
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = ""
+    for block in blocks:
+        pending += decoder.decode(block)
+        lines = pending.splitlines(keepends=True)
+        # The last line may continue in the next block (or be a '\r' before '\n')
+        pending = lines.pop() if lines else ""
+        for line in lines:
+            yield line.splitlines()[0]
+    pending += decoder.decode(b"", final=True)
+    yield from pending.splitlines()
+
+def split_text_stream(lines: Iterable[str], max_chunk_size: int = None, max_chunk_tokens: int = None) -> Iterator[str]:
+    """Split a stream of lines into chunks as they come in.
+    
+    Yields the same chunks as split_text('\n'.join(lines)), but holds at
+    most one heading section in memory, or one paragraph once a section is
+    known to be too big to keep whole.
+    
+    Args:
+        lines: Lines of the document, without line endings
+        max_chunk_size: Maximum size for each piece (default from config)
+        max_chunk_tokens: Token budget for packed chunks (default from config)
+        
+    Yields:
+        str: Chunks in document order
+    """
+    max_size = max_chunk_size or ACTIVE_CONFIG["chunk_size"]
+    return pack_chunks(_split_lines(lines, max_size), _token_budget(max_chunk_tokens))
+
+def _split_lines(lines: Iterable[str], max_size: int) -> Iterator[str]:
+    """Streaming version of split_by_headings, see split_text_stream."""
+    section_lines = []
+    section_size = 0  # length of '\n'.join(section_lines)
+    check_at = max_size  # size at which to check again if the section is too big
+    oversized = False
+    
+    def flush_section():
+        section = '\n'.join(section_lines).strip()
+        if not section:
+            return []
+        if not oversized and len(section) <= max_size:
+            return [section]
+        return split_by_paragraphs(section, max_size)
+    
+    for line in lines:
+        if line.startswith('#'):
+            yield from (s for s in flush_section() if s.strip())
+            section_lines = [line]
+            section_size = len(line)
+            check_at = max_size
+            oversized = False
+            continue
+        
+        # Cut an oversized section at a paragraph break: splitting the parts
+        # gives the same paragraphs as splitting the whole section
+        if oversized and line == "" and section_lines and section_lines[-1] != "":
+            yield from (s for s in split_by_paragraphs('\n'.join(section_lines), max_size) if s.strip())
+            section_lines = []
+            section_size = 0
+            continue
+        
+        section_size += len(line) + (1 if section_lines else 0)
+        section_lines.append(line)
+        if not oversized and section_size > check_at:
+            if len('\n'.join(section_lines).strip()) > max_size:
+                oversized = True
+            else:
+                # Mostly whitespace so far, check again once it doubles
+                check_at = section_size * 2
+    
+    yield from (s for s in flush_section() if s.strip())
 
 def split_by_headings(text: str, max_size: int) -> List[str]:
     """Split text by markdown headings (Level 1).
@@ -79,6 +213,11 @@ def split_by_paragraphs(text: str, max_size: int) -> List[str]:
 def split_by_sentences(text: str, max_size: int) -> List[str]:
     """Split text by sentences (Level 3).
     
+    A sentence ends after '. ', '! ', '? ', '.\n', '!\n', '?\n' or '...',
+    found by one regex scan. A boundary only counts if it lies entirely
+    within the current sentence, e.g. '....' ends one sentence after the
+    third dot.
+    
     Args:
         text: Text content to split
         max_size: Maximum size for each chunk
@@ -86,31 +225,28 @@ def split_by_sentences(text: str, max_size: int) -> List[str]:
     Returns:
         List[str]: List of text chunks split by sentences
     """
-    sentence_boundaries = ['. ', '! ', '? ', '...', '.\n', '!\n', '?\n']
-    current_sentence = ""
     sentences = []
+    start = 0
     
-    for char in text:
-        current_sentence += char
-        
-        is_sentence_boundary = any(current_sentence.endswith(end) for end in sentence_boundaries)
-        if is_sentence_boundary:
-            is_small_enough = len(current_sentence) <= max_size
-            if is_small_enough:
-                sentences.append(current_sentence)
-            else:
-                sentences.extend(split_at_word_boundaries(current_sentence, max_size))
-            current_sentence = ""
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        if match.start() < start:
+            continue  # overlaps the boundary that ended the previous sentence
+        end = match.end(1)
+        _add_sentence(sentences, text[start:end], max_size)
+        start = end
     
-    if current_sentence:  # Handle any remaining text
-        is_small_enough = len(current_sentence) <= max_size
-        if is_small_enough:
-            sentences.append(current_sentence)
-        else:
-            sentences.extend(split_at_word_boundaries(current_sentence, max_size))
+    if start < len(text):  # Handle any remaining text
+        _add_sentence(sentences, text[start:], max_size)
     
     return sentences
 
+def _add_sentence(sentences: List[str], sentence: str, max_size: int) -> None:
+    is_small_enough = len(sentence) <= max_size
+    if is_small_enough:
+        sentences.append(sentence)
+    else:
+        sentences.extend(split_at_word_boundaries(sentence, max_size))
+
 def split_at_word_boundaries(text: str, max_size: int) -> List[str]:
     """Split text at word boundaries as last resort (Level 4).
     
@@ -122,19 +258,24 @@ def split_at_word_boundaries(text: str, max_size: int) -> List[str]:
         List[str]: List of text chunks split by word boundaries
     """
     chunks = []
-    current_chunk = ""
-    words = text.split()
+    current_words = []
+    current_size = 0  # length of the chunk with a trailing space after every word
     
-    for word in words:
-        is_small_enough = len(current_chunk) + len(word) + 1 <= max_size
+    for word in text.split():
+        is_small_enough = current_size + len(word) + 1 <= max_size
         if is_small_enough:
-            current_chunk += word + " "
+            current_words.append(word)
+            current_size += len(word) + 1
         else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = word + " "
+            if current_words:
+                chunks.append(' '.join(current_words))
+            current_words = [word]
+            current_size = len(word) + 1
     
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    if current_words:
+        chunks.append(' '.join(current_words))
     
     return chunks
+
+# Stored in the document manifest, files split with other settings are split again
+CHUNKING_FINGERPRINT = f"v{_SPLITTER_VERSION}:{ACTIVE_CONFIG['chunk_size']}:{_token_budget()}"
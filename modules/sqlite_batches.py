@@ -0,0 +1,15 @@
+from typing import Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Keep IN (...) lookups under SQLite's bound variable limit
+LOOKUP_BATCH_SIZE = 500
+
+def lookup_batches(values: Sequence[T], size: int = LOOKUP_BATCH_SIZE) -> Iterator[Sequence[T]]:
+    """Split values into batches small enough for one IN (...) lookup each."""
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def placeholders(values: Sequence) -> str:
+    """Get the "?,?,..." list of bound parameters for an IN (...) clause over values."""
+    return ",".join("?" * len(values))
@@ -0,0 +1,23 @@
+import tiktoken
+from functools import lru_cache
+from modules.embedding_conf import EMBEDDING_MODEL
+
+@lru_cache(maxsize=None)
+def get_encoding() -> tiktoken.Encoding:
+    """Get the tiktoken encoding for the active model.
+
+    Ollama models don't have a tiktoken encoding, so they fall back to
+    cl100k_base, which is close enough for sizing requests.
+    """
+    try:
+        return tiktoken.encoding_for_model(EMBEDDING_MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text for the active model."""
+    return len(get_encoding().encode_ordinary(text))
+
+def count_tokens_batch(texts: list[str]) -> list[int]:
+    """Count tokens for many texts at once (encodes in parallel threads)."""
+    return [len(tokens) for tokens in get_encoding().encode_ordinary_batch(texts)]
@@ -0,0 +1,44 @@
+from modules.logger import logger
+from modules.collection_manager import init_collection
+from modules.collection_version import collection_version
+from modules.indexer import missing_chunk_fields
+
+# Chunks read from ChromaDB at a time
+PAGE_SIZE = 1000
+
+def backfill_chunk_metadata() -> int:
+    """Add metadata fields that chunks written by older versions lack (see missing_chunk_fields).
+
+    Only needed once for collections built before those fields existed,
+    chunks written since have them. Chunks that already have every field
+    are left alone, so it's safe to run again.
+    """
+    _, collection = init_collection()
+    updated = 0
+    offset = 0
+    while True:
+        page = collection.get(include=['documents', 'metadatas'], limit=PAGE_SIZE, offset=offset)
+        if not page['ids']:
+            break
+        offset += len(page['ids'])
+
+        updates = []
+        for chunk_id, metadata, text in zip(page['ids'], page['metadatas'], page['documents']):
+            missing = missing_chunk_fields(metadata, text)
+            if missing:
+                updates.append((chunk_id, {**metadata, **missing}))
+        if updates:
+            collection.update(
+                ids=[chunk_id for chunk_id, _ in updates],
+                metadatas=[metadata for _, metadata in updates]
+            )
+            updated += len(updates)
+        logger.info("Checked %d chunks so far (%d updated)", offset, updated)
+
+    if updated:
+        collection_version.bump()
+    return updated
+
+if __name__ == "__main__":
+    count = backfill_chunk_metadata()
+    logger.info("Backfill complete, %d chunks updated", count)
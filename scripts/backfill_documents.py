@@ -0,0 +1,45 @@
+import asyncio
+from datetime import datetime
+from modules.logger import logger
+from modules.collection_manager import init_collection
+from modules.embedding_conf import EMBEDDING_MODEL
+from modules.env import BUCKET_NAME
+from api.database import AsyncSessionLocal
+from api.repositories.document_repository import DocumentRepository
+
+async def backfill_documents(bucket: str) -> int:
+    """Fill the document manifest from chunks already stored in ChromaDB.
+
+    Only needed once for collections built before the documents table
+    existed. Scans every chunk's metadata, so it is slow on big collections.
+    """
+    _, collection = init_collection()
+    results = collection.get(include=['metadatas'])
+
+    doc_stats = {}
+    for metadata in results['metadatas']:
+        source = metadata['source']
+        stats = doc_stats.setdefault(source, {"chunk_count": 0, "embedded_at": None})
+        stats["chunk_count"] += 1
+        if metadata.get('embedded_at'):
+            stats["embedded_at"] = datetime.fromisoformat(metadata['embedded_at'])
+
+    async with AsyncSessionLocal() as db:
+        documents = DocumentRepository(db)
+        for source, stats in doc_stats.items():
+            if await documents.get(source):
+                continue
+            await documents.upsert(
+                key=source,
+                bucket=bucket,  # not stored in chunk metadata
+                chunk_count=stats["chunk_count"],
+                embedding_model=EMBEDDING_MODEL,
+                embedded_at=stats["embedded_at"] or datetime.utcnow()
+            )
+            logger.info("Recorded %s (%d chunks)", source, stats["chunk_count"])
+        await db.commit()
+    return len(doc_stats)
+
+if __name__ == "__main__":
+    count = asyncio.run(backfill_documents(BUCKET_NAME))
+    logger.info("Backfill complete, %d documents in collection", count)
@@ -0,0 +1,124 @@
+import argparse
+import glob
+import os
+import time
+from typing import Callable, List
+from modules import splitter
+from modules.logger import logger
+
+def legacy_split_by_sentences(text: str, max_size: int) -> List[str]:
+    """The character-by-character sentence splitter, kept for comparison."""
+    sentence_boundaries = ['. ', '! ', '? ', '...', '.\n', '!\n', '?\n']
+    current_sentence = ""
+    sentences = []
+
+    for char in text:
+        current_sentence += char
+
+        is_sentence_boundary = any(current_sentence.endswith(end) for end in sentence_boundaries)
+        if is_sentence_boundary:
+            is_small_enough = len(current_sentence) <= max_size
+            if is_small_enough:
+                sentences.append(current_sentence)
+            else:
+                sentences.extend(legacy_split_at_word_boundaries(current_sentence, max_size))
+            current_sentence = ""
+
+    if current_sentence:
+        is_small_enough = len(current_sentence) <= max_size
+        if is_small_enough:
+            sentences.append(current_sentence)
+        else:
+            sentences.extend(legacy_split_at_word_boundaries(current_sentence, max_size))
+
+    return sentences
+
+def legacy_split_at_word_boundaries(text: str, max_size: int) -> List[str]:
+    """The string concatenating word splitter, kept for comparison."""
+    chunks = []
+    current_chunk = ""
+    words = text.split()
+
+    for word in words:
+        is_small_enough = len(current_chunk) + len(word) + 1 <= max_size
+        if is_small_enough:
+            current_chunk += word + " "
+        else:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = word + " "
+
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+
+    return chunks
+
+def legacy_split_text(text: str, max_size: int) -> List[str]:
+    """split_text with the legacy sentence and word levels swapped in."""
+    current = splitter.split_by_sentences, splitter.split_at_word_boundaries
+    splitter.split_by_sentences = legacy_split_by_sentences
+    splitter.split_at_word_boundaries = legacy_split_at_word_boundaries
+    try:
+        return splitter.split_text(text, max_size)
+    finally:
+        splitter.split_by_sentences, splitter.split_at_word_boundaries = current
+
+def best_time(fn: Callable[[], List[str]], repeats: int) -> tuple[float, List[str]]:
+    """Run fn repeats times, return the fastest run and its output."""
+    best = float("inf")
+    result = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare splitter throughput (MB/s) of the legacy and current implementations")
+    parser.add_argument("--files", default="test_files/*.md", help="Glob of markdown files to split")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Max chunk size (default: from the model config)")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per file, the fastest counts")
+    args = parser.parse_args()
+
+    chunk_size = args.chunk_size or splitter.ACTIVE_CONFIG["chunk_size"]
+    paths = sorted(glob.glob(args.files))
+    if not paths:
+        logger.error("No files match %s", args.files)
+        return
+
+    benchmarks = {
+        # Whole pipeline, as used during ingestion
+        "split_text": (lambda t: legacy_split_text(t, chunk_size), lambda t: splitter.split_text(t, chunk_size)),
+        # Sentence level on the whole file, as if it were one long paragraph
+        "split_by_sentences": (
+            lambda t: legacy_split_by_sentences(t, chunk_size),
+            lambda t: splitter.split_by_sentences(t, chunk_size)
+        ),
+    }
+
+    totals = {name: [0.0, 0.0] for name in benchmarks}
+    total_mb = 0.0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        mb = len(text.encode("utf-8")) / (1024 * 1024)
+        total_mb += mb
+
+        for name, (legacy, current) in benchmarks.items():
+            legacy_time, legacy_chunks = best_time(lambda: legacy(text), args.repeats)
+            current_time, current_chunks = best_time(lambda: current(text), args.repeats)
+            if legacy_chunks != current_chunks:
+                logger.error("%s output differs for %s", name, path)
+            totals[name][0] += legacy_time
+            totals[name][1] += current_time
+            print(f"{os.path.basename(path):<40} {name:<20} {mb:7.2f} MB  "
+                f"legacy {mb / legacy_time:8.2f} MB/s  current {mb / current_time:8.2f} MB/s  "
+                f"({legacy_time / current_time:5.1f}x)")
+
+    for name, (legacy_time, current_time) in totals.items():
+        print(f"{'TOTAL':<40} {name:<20} {total_mb:7.2f} MB  "
+            f"legacy {total_mb / legacy_time:8.2f} MB/s  current {total_mb / current_time:8.2f} MB/s  "
+            f"({legacy_time / current_time:5.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+from itertools import groupby
+from modules.logger import logger
+from modules.collection_manager import init_collection
+from modules.collection_version import collection_version
+from modules.lexical_index import lexical_index
+
+# Chunks read from ChromaDB at a time
+PAGE_SIZE = 1000
+
+def build_lexical_index() -> int:
+    """Add chunks already stored in ChromaDB to the BM25 lexical index.
+
+    Only needed once for collections built before the lexical index existed,
+    chunks written since are indexed as they're synced. Chunks that are
+    already indexed are skipped, so it's safe to run again.
+    """
+    _, collection = init_collection()
+    added = 0
+    offset = 0
+    while True:
+        page = collection.get(include=['documents', 'metadatas'], limit=PAGE_SIZE, offset=offset)
+        if not page['ids']:
+            break
+        offset += len(page['ids'])
+
+        chunks = sorted(zip(page['metadatas'], page['ids'], page['documents']), key=lambda c: c[0]['source'])
+        for source, group in groupby(chunks, key=lambda c: c[0]['source']):
+            added += lexical_index.add(source, [(chunk_id, text) for _, chunk_id, text in group])
+        logger.info("Indexed %d chunks so far (%d new)", offset, added)
+
+    if added:
+        collection_version.bump()
+    return added
+
+if __name__ == "__main__":
+    count = build_lexical_index()
+    logger.info("Lexical index built, %d chunks added: %s", count, lexical_index.stats())
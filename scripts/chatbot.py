@@ -1,11 +1,11 @@
 import os
-from typing import List
 from openai import OpenAI
 from dotenv import load_dotenv
 import argparse
 from modules.logger import logger
 import logging
 from modules.collection_manager import init_collection, check_collection_health
+from modules.embeddings import get_query_embedding
 
 # Load environment variables
 load_dotenv()
@@ -14,21 +14,9 @@ load_dotenv()
 openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 chroma_client, collection = init_collection()
 
-def get_embeddings(text: str) -> List[float]:
-    """Get embeddings from OpenAI."""
-    try:
-        response = openai_client.embeddings.create(
-            model="text-embedding-3-large",
-            input=text
-        )
-        return response.data[0].embedding
-    except Exception as e:
-        logger.error("Failed to get embeddings: %s", str(e))
-        raise
-
 def get_relevant_context(query: str, limit: int = 5) -> str:
     """Get relevant documents from ChromaDB."""
-    query_embedding = get_embeddings(query)
+    query_embedding = get_query_embedding(query)
     
     results = collection.query(
         query_embeddings=[query_embedding],
@@ -0,0 +1,24 @@
+import argparse
+import json
+from modules.logger import logger
+from modules.embedding_cache import embedding_cache, query_embedding_cache
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the chunk and query embedding caches")
+    parser.add_argument(
+        "command",
+        choices=["stats", "clear"],
+        help="'stats' prints cache size, 'clear' removes every cached embedding"
+    )
+    args = parser.parse_args()
+
+    if args.command == "clear":
+        removed = embedding_cache.clear()
+        removed_queries = query_embedding_cache.clear()
+        logger.info("Removed %d cached chunk and %d cached query embeddings from %s",
+            removed, removed_queries, embedding_cache.path)
+    else:
+        print(json.dumps({"chunks": embedding_cache.stats(), "queries": query_embedding_cache.stats()}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,39 @@
 import os
-from typing import List, Dict
-from openai import OpenAI
+import asyncio
+from datetime import datetime
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 import argparse
-from modules.s3_connection import get_s3_client, check_bucket_exists, get_file_content
-from modules.splitter import split_text
+from modules.s3_connection import get_s3_client, check_bucket_exists, get_file
+from modules.splitter import split_text, CHUNKING_FINGERPRINT
 from modules.logger import logger
 import logging
-from modules.collection_manager import init_collection, check_document_exists
+from modules.collection_manager import init_collection, get_document_chunk_ids
+from modules.embeddings import get_document_chunk_embeddings, get_query_embedding
+from modules.embedding_conf import EMBEDDING_MODEL
+from modules.hashing import content_hash
+from modules.indexer import sync_document_chunks
+from api.database import AsyncSessionLocal
+from api.repositories.document_repository import DocumentRepository
 
 # Load environment variables
 load_dotenv()
 
 # Initialize clients
 s3_client = get_s3_client()
-openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 chroma_client, collection = init_collection()
 
-def get_embeddings(texts: List[str]) -> List[List[float]]:
-    """Get embeddings from OpenAI."""
-    try:
-        logger.info("Getting embeddings for %d chunks", len(texts))
-        response = openai_client.embeddings.create(
-            model="text-embedding-3-large",
-            input=texts
-        )
-        logger.debug("Successfully got embeddings")
-        return [data.embedding for data in response.data]
-    except Exception as e:
-        logger.error("Failed to get embeddings: %s", str(e))
-        raise
+async def _get_processed_chunk_count(key: str) -> Optional[int]:
+    """Get chunk count from the document manifest, None if not processed."""
+    async with AsyncSessionLocal() as db:
+        document = await DocumentRepository(db).get(key)
+        return document.chunk_count if document else None
+
+async def _record_document(key: str, bucket: str, **fields) -> None:
+    """Create or update the document manifest entry."""
+    async with AsyncSessionLocal() as db:
+        await DocumentRepository(db).upsert(key=key, bucket=bucket, embedding_model=EMBEDDING_MODEL, **fields)
+        await db.commit()
 
 def process_markdown_file(bucket: str, key: str, force_reload: bool = False) -> Dict:
     """Process a single markdown file."""
@@ -37,13 +41,23 @@ def process_markdown_file(bucket: str, key: str, force_reload: bool = False) ->
         logger.info("Processing file: %s from bucket: %s", key, bucket)
         
         # Check if already processed
-        doc_ids = [f"{key}_{i}" for i in range(1000)]  # Check reasonable range
-        existing_docs = [id for id in doc_ids if check_document_exists(collection, id)]
+        chunk_count = asyncio.run(_get_processed_chunk_count(key))
+        if chunk_count is not None and not force_reload:
+            logger.info("File %s already processed (%d chunks). Use force_reload=True to reprocess", 
+                       key, chunk_count)
+            return {
+                "status": "skipped",
+                "chunks_processed": chunk_count,
+                "source": key
+            }
+
+        existing_docs = get_document_chunk_ids(collection, key)
         logger.debug(f"Found {len(existing_docs)} documents")
         
         if existing_docs and not force_reload:
             logger.info("File %s already processed (%d chunks). Use force_reload=True to reprocess", 
                        key, len(existing_docs))
+            asyncio.run(_record_document(key, bucket, chunk_count=len(existing_docs), embedded_at=datetime.utcnow()))
             return {
                 "status": "skipped",
                 "chunks_processed": len(existing_docs),
@@ -52,29 +66,29 @@ def process_markdown_file(bucket: str, key: str, force_reload: bool = False) ->
         
         # Get content from S3
         logger.debug("Fetching content from S3")
-        content = get_file_content(bucket, key, s3_client)
+        content, file_info = get_file(bucket, key, s3_client)
         
         # Split into chunks
         logger.debug("Splitting content into chunks")
         chunks = split_text(content)
         logger.info("Split into %d chunks", len(chunks))
         
-        # Get embeddings
-        embeddings = get_embeddings(chunks)
-        
-        # Delete old chunks if reloading
-        if existing_docs and force_reload:
-            logger.info("Removing old chunks before reload")
-            collection.delete(ids=existing_docs)
-        
-        # Store in ChromaDB
-        logger.debug("Storing chunks in ChromaDB")
-        collection.add(
-            documents=chunks,
-            embeddings=embeddings,
-            ids=[f"{key}_{i}" for i in range(len(chunks))],
-            metadatas=[{"source": key, "chunk": i} for i in range(len(chunks))]
+        # Embed and store only new chunks, drop removed ones
+        logger.debug("Syncing chunks with ChromaDB")
+        embedded_at = datetime.utcnow()
+        sync_document_chunks(
+            collection, key, chunks, get_document_chunk_embeddings, embedded_at, tags=file_info["tags"]
         )
+        asyncio.run(_record_document(
+            key,
+            bucket,
+            chunk_count=len(chunks),
+            embedded_at=embedded_at,
+            content_hash=content_hash(content),
+            etag=file_info["etag"],
+            last_modified=file_info["last_modified"],
+            chunking=CHUNKING_FINGERPRINT
+        ))
         
         logger.info("Successfully processed file %s", key)
         return {
@@ -96,7 +110,7 @@ def search_similar(query: str, limit: int = 5) -> List[Dict]:
     logger.info("Searching for: %s (limit: %d)", query, limit)
     
     # Get query embedding
-    query_embedding = get_embeddings([query])[0]
+    query_embedding = get_query_embedding(query)
     
     # Search in ChromaDB
     logger.debug("Querying ChromaDB")
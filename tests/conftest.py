@@ -0,0 +1,10 @@
+import os
+
+# modules.env requires these at import time
+for key, value in {
+    "EMBEDDING_MODEL": "text-embedding-3-small",
+    "AWS_ACCESS_KEY_ID": "test",
+    "AWS_SECRET_ACCESS_KEY": "test",
+    "BUCKET_NAME": "test",
+}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base
+from api.repositories.document_repository import DocumentRepository
+from modules.s3_connection import encode_key
+
+def test_list_keys_between_compares_raw_keys(tmp_path):
+    """Encoded manifest keys are matched by their raw S3 key, like the listing they're compared with."""
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/documents.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        raw_keys = ["docs/a b.md", "docs/a+b.md", "docs/a.md", "docs/b.md", "docs/c 1.md", "other/a b.md"]
+        async with session_factory() as db:
+            documents = DocumentRepository(db)
+            for raw_key in raw_keys:
+                await documents.upsert(
+                    key=encode_key(raw_key),
+                    bucket="bucket",
+                    chunk_count=1,
+                    embedding_model="model",
+                    embedded_at=datetime.utcnow()
+                )
+            await db.commit()
+
+            # "docs/a b.md" is encoded as "docs/a+b.md", which sorts after "docs/a b.md"
+            assert await documents.list_keys_between("bucket", "docs/", None, "docs/a b.md") == [
+                encode_key("docs/a b.md")
+            ]
+            assert await documents.list_keys_between("bucket", "docs/", "docs/a b.md", "docs/b.md") == [
+                encode_key("docs/a+b.md"), "docs/a.md", "docs/b.md"
+            ]
+            assert await documents.list_keys_between("bucket", "docs/c ", None, None) == [encode_key("docs/c 1.md")]
+            assert await documents.list_keys_between("other", "docs/", None, None) == []
+        await engine.dispose()
+
+    asyncio.run(run())
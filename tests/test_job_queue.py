@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base
+from api.job_queue import JobQueue
+from api.models import Job
+
+async def _session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/jobs.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+def test_job_orphaned_after_start_is_requeued(tmp_path):
+    """A job whose dead worker's lease runs out after startup is still picked up."""
+    async def run():
+        engine, session_factory = await _session_factory(tmp_path)
+        async with session_factory() as db:
+            db.add(Job(
+                job_id="orphan",
+                status="processing",
+                bucket="bucket",
+                file_key="doc.md",
+                attempts=1,
+                worker_id="dead-worker",
+                started_at=datetime.utcnow(),
+                # Still valid when the queue starts, so the startup sweep skips it
+                lease_expires_at=datetime.utcnow() + timedelta(seconds=1),
+            ))
+            await db.commit()
+
+        handled = asyncio.Event()
+
+        async def handler(job: Job) -> None:
+            assert job.job_id == "orphan"
+            handled.set()
+
+        queue = JobQueue(workers=1, lease_seconds=1, max_attempts=3, drain_timeout=1, session_factory=session_factory)
+        await queue.start(handler)
+        try:
+            await asyncio.wait_for(handled.wait(), timeout=5)
+        finally:
+            await queue.stop()
+            await engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base
+from api.models import Job
+from api.repositories.document_repository import DocumentRepository
+from api.repositories.watch_checkpoint_repository import WatchCheckpointRepository
+from api.s3_watcher import S3Watcher
+from modules.embedding_conf import EMBEDDING_MODEL
+from modules.s3_connection import encode_key
+from modules.splitter import CHUNKING_FINGERPRINT
+
+LAST_MODIFIED = datetime(2025, 1, 20, 12, 0, 0)
+
+class FakeS3:
+    """Enough of ListObjectsV2 for the watcher, with small pages."""
+
+    def __init__(self, objects: dict[str, str], page_size: int):
+        self.objects = objects  # raw key -> ETag
+        self.page_size = page_size
+        self.requests = []
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None, StartAfter=None):
+        self.requests.append({"Prefix": Prefix, "ContinuationToken": ContinuationToken, "StartAfter": StartAfter})
+        after = ContinuationToken or StartAfter or ""
+        keys = sorted(k for k in self.objects if k.startswith(Prefix) and k > after)
+        page = keys[:self.page_size]
+        truncated = len(keys) > len(page)
+        return {
+            "Contents": [
+                {"Key": k, "ETag": self.objects[k], "LastModified": LAST_MODIFIED, "Size": 10} for k in page
+            ],
+            "IsTruncated": truncated,
+            **({"NextContinuationToken": page[-1]} if truncated else {}),
+        }
+
+def test_poll_queues_new_changed_and_deleted_files_and_resumes(tmp_path):
+    """Each poll picks up where the checkpoint left off, and a pass finds new, changed and deleted files."""
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/watcher.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        s3 = FakeS3({
+            "docs/a.md": '"new-etag"',      # changed since processed
+            "docs/b b.md": '"b"',           # new, stored URL encoded
+            "docs/c.md": '"c"',             # unchanged
+            "docs/notes.txt": '"n"',        # not markdown
+            "other/x.md": '"x"',            # outside the prefix
+        }, page_size=2)
+        async with session_factory() as db:
+            documents = DocumentRepository(db)
+            for key, etag in [("docs/a.md", '"old-etag"'), ("docs/c.md", '"c"'), ("docs/gone.md", '"g"')]:
+                await documents.upsert(
+                    key=key, bucket="bucket", chunk_count=1, embedding_model=EMBEDDING_MODEL,
+                    embedded_at=LAST_MODIFIED, etag=etag, last_modified=LAST_MODIFIED, chunking=CHUNKING_FINGERPRINT
+                )
+            await db.commit()
+
+        def watcher():
+            return S3Watcher(
+                "bucket", prefix="docs/", pages_per_poll=1, s3_client=s3,
+                session_factory=session_factory, notify=lambda: None
+            )
+
+        async def jobs():
+            async with session_factory() as db:
+                result = await db.execute(select(Job.file_key, Job.kind, Job.force_reload).order_by(Job.file_key))
+                return [tuple(row) for row in result]
+
+        # First page: docs/a.md and docs/b b.md
+        result = await watcher().poll_once()
+        assert result == {"listed": 2, "queued": 2, "deleted": 0, "pass_complete": False}
+        assert await jobs() == [("docs/a.md", "document", True), (encode_key("docs/b b.md"), "document", False)]
+        async with session_factory() as db:
+            assert (await WatchCheckpointRepository(db).get("bucket", "docs/")).start_after == "docs/b b.md"
+
+        # A new watcher (e.g. after a restart) resumes after the checkpoint
+        result = await watcher().poll_once()
+        assert s3.requests[-1]["StartAfter"] == "docs/b b.md"
+        assert result == {"listed": 2, "queued": 0, "deleted": 1, "pass_complete": True}
+        assert ("docs/gone.md", "delete", False) in await jobs()
+        async with session_factory() as db:
+            checkpoint = await WatchCheckpointRepository(db).get("bucket", "docs/")
+            assert checkpoint.start_after is None
+            assert checkpoint.last_pass_completed_at is not None
+
+        # The next pass starts over, and files with a pending job aren't queued twice
+        result = await watcher().poll_once()
+        assert s3.requests[-1]["StartAfter"] is None
+        assert result["queued"] == 0 and result["deleted"] == 0
+        assert len(await jobs()) == 3
+        await engine.dispose()
+
+    asyncio.run(run())